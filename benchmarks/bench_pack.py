@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compare loading split class documents from a directory of files against a schema pack.
+
+Usage: python benchmarks/bench_pack.py [source.yaml] [repeat]
+"""
+
+import json
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from ga4gh.gks.metaschema.scripts.source2pack import write_pack
+from ga4gh.gks.metaschema.scripts.source2splitjs import build_split_doc
+from ga4gh.gks.metaschema.tools.schema_pack import SchemaPack
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+
+root = Path(__file__).resolve().parents[1]
+
+
+def main(source: Path, repeat: int) -> None:
+    proc = YamlSchemaProcessor(source)
+    kw = proc.schema_def_keyword
+    classes = [cls for cls in proc.for_js[kw] if not proc.class_is_protected(cls)]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        split_dir = tmp / "json"
+        split_dir.mkdir()
+        for cls in classes:
+            with open(split_dir / cls, "w") as f:
+                json.dump(build_split_doc(proc, cls), f, indent=3)
+        pack_fp = tmp / "schema.gkspack"
+        with open(pack_fp, "wb") as f:
+            write_pack(proc, f)
+
+        def load_dir_all():
+            for cls in classes:
+                with open(split_dir / cls) as f:
+                    json.load(f)
+
+        def load_pack_all():
+            with SchemaPack(pack_fp) as pack:
+                for cls in classes:
+                    pack.get_split(cls)
+
+        def load_dir_one():
+            with open(split_dir / classes[-1]) as f:
+                json.load(f)
+
+        def load_pack_one():
+            with SchemaPack(pack_fp) as pack:
+                pack.get_split(classes[-1])
+
+        print(f"{source.name}: {len(classes)} classes")
+        for name, func in [
+            ("directory, all classes", load_dir_all),
+            ("pack, all classes", load_pack_all),
+            ("directory, one class", load_dir_one),
+            ("pack, one class", load_pack_one),
+        ]:
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            print(f"  {name:<24} {best * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else root / "tests/data/vrs/vrs-source.yaml"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    main(source, repeat)
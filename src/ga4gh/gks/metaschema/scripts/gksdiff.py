@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""report class and property changes between two versions of a source document"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
+from ga4gh.gks.metaschema.tools.schema_diff import diff_schemas
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+
+parser = argparse.ArgumentParser()
+parser.add_argument("old")
+parser.add_argument("new")
+parser.add_argument("--merged", action="store_true", help="compare schemas with imports merged")
+parser.add_argument("--json", action="store_true", help="write the report as JSON")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+add_profile_arguments(parser)
+
+
+def main(report: dict) -> list[str]:
+    """Returns the lines of a human readable diff report
+
+    :param report: report returned by ``diff_schemas``
+    """
+    lines = [f"+ {cls}" for cls in report["added_classes"]]
+    lines.extend(f"- {cls}" for cls in report["removed_classes"])
+    for cls, change in report["changed_classes"].items():
+        lines.append(f"~ {cls}")
+        lines.extend(f"    + {p}" for p in change.get("added_properties", []))
+        lines.extend(f"    - {p}" for p in change.get("removed_properties", []))
+        lines.extend(f"    ~ {p}" for p in change.get("changed_properties", []))
+        if "required" in change:
+            required = [f"+{p}" for p in change["required"]["added"]] + [f"-{p}" for p in change["required"]["removed"]]
+            lines.append(f"    required {' '.join(required)}")
+        if "maturity" in change:
+            lines.append(f"    maturity {change['maturity'][0]} -> {change['maturity'][1]}")
+        if "ga4gh" in change:
+            lines.append(f"    ga4gh {json.dumps(change['ga4gh'][0])} -> {json.dumps(change['ga4gh'][1])}")
+        if "changed_attributes" in change:
+            lines.append(f"    changed {', '.join(change['changed_attributes'])}")
+    return lines
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        procs = []
+        for infile in (args.old, args.new):
+            p = YamlSchemaProcessor(Path(infile), trusted=args.trusted)
+            if args.merged:
+                p.merge_imported()
+            procs.append(p)
+        report = diff_schemas(*procs)
+        if args.json:
+            json.dump(report, sys.stdout, indent=3)
+            print()
+        else:
+            for line in main(report):
+                print(line)
+        sys.exit(1 if report["added_classes"] or report["removed_classes"] or report["changed_classes"] else 0)
+
+
+if __name__ == "__main__":
+    cli()
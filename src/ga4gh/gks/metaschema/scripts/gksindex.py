@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""query the classes, properties and references of a source document"""
+
+import argparse
+import json
+from pathlib import Path
+
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
+from ga4gh.gks.metaschema.tools.schema_index import SchemaIndex
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+
+parser = argparse.ArgumentParser()
+parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("--sqlite", metavar="DBFILE", help="export the index to an SQLite database")
+subparsers = parser.add_subparsers(dest="query")
+subparsers.add_parser("referrers", help="classes referencing a class").add_argument("name")
+subparsers.add_parser("defines", help="classes defining a property").add_argument("name")
+subparsers.add_parser("inherent", help="ga4gh.inherent properties of a class").add_argument("name")
+subparsers.add_parser("class", help="summary of a class").add_argument("name")
+add_profile_arguments(parser)
+
+
+def main(index: SchemaIndex, query: str, name: str) -> list[str]:
+    """Returns the output lines of a query against a schema index
+
+    :param index: schema index
+    :param query: one of "referrers", "defines", "inherent" or "class"
+    :param name: class or property name to look up
+    """
+    if query == "referrers":
+        return [f"{edge.source}.{edge.property}" if edge.property else edge.source for edge in index.referrers(name)]
+    elif query == "defines":
+        return index.classes_defining(name)
+    elif query == "inherent":
+        return list(index.inherent(name))
+    elif query == "class":
+        summary = index.classes[name]._asdict()
+        summary["properties"] = {p: r._asdict() for p, r in index.class_properties[name].items()}
+        summary["references"] = sorted({edge.target for edge in index.refs.get(name, [])})
+        return [json.dumps(summary, indent=3)]
+    raise ValueError(f"unknown query {query}")
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        p = YamlSchemaProcessor(Path(args.infile), trusted=args.trusted)
+        if args.sqlite:
+            p.index.to_sqlite(args.sqlite)
+        if args.query in ("inherent", "class") and args.name not in p.index.classes:
+            parser.error(f"unknown class: {args.name}")
+        if args.query:
+            for line in main(p.index, args.query, args.name):
+                print(line)
+
+
+if __name__ == "__main__":
+    cli()
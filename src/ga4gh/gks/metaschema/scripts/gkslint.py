@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""check source documents against the GKS metaschema rules, reporting every violation"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+from ga4gh.gks.metaschema.tools.validation import SchemaValidationError
+
+parser = argparse.ArgumentParser()
+parser.add_argument("infiles", nargs="+")
+parser.add_argument("--imports", action="store_true", help="also check imported source documents")
+add_profile_arguments(parser)
+
+
+def main(proc: YamlSchemaProcessor, imports: bool = False, seen: set[Path] | None = None) -> list[str]:
+    """Returns a report line for each rule violation in a processed schema
+
+    :param proc: schema processor created with ``check=False``
+    :param imports: also report violations in imported schemas
+    :param seen: resolved paths of schemas already reported, which are skipped
+    """
+    if seen is None:
+        seen = set()
+    schema_fp = proc.schema_fp.resolve()
+    if schema_fp in seen:
+        return []
+    seen.add(schema_fp)
+    lines = [f"{proc.schema_fp}: {violation}" for violation in proc.validate()]
+    if imports:
+        for other in proc.imports.values():
+            lines.extend(main(other, imports=True, seen=seen))
+    return lines
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        report = []
+        seen = set()
+        for infile in args.infiles:
+            try:
+                p = YamlSchemaProcessor(Path(infile), check=False)
+            except SchemaValidationError as e:
+                # violations that stop processing, in the source or an import
+                report.extend(f"{e.source}: {violation}" for violation in e.violations)
+                continue
+            report.extend(main(p, imports=args.imports, seen=seen))
+        for line in report:
+            print(line)
+        sys.exit(1 if report else 0)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""serve split schemas over HTTP from memory
+
+Split JSON and YAML documents are held in memory and served at the paths produced by
+``YamlSchemaProcessor.get_class_abs_path``, so validators resolving ``$id`` and ``$ref``
+URLs against the server get the same documents ``source2splitjs`` writes. Responses
+carry an ETag, honour ``If-None-Match`` and are gzip encoded when accepted. Sources are
+polled for changes and reprocessed in the background.
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+import yaml
+
+from ga4gh.gks.metaschema.scripts.source2splitjs import prepare_split_doc
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+
+parser = argparse.ArgumentParser()
+parser.add_argument("infiles", nargs="+")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", type=int, default=8000)
+parser.add_argument(
+    "--reload-interval", type=float, default=1.0, help="seconds between checks for source changes, 0 disables"
+)
+add_profile_arguments(parser)
+
+CONTENT_TYPES = {"json": "application/schema+json", "yaml": "application/yaml"}
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+}
+
+# largest request body read and discarded on a kept-alive connection
+MAX_REQUEST_BODY = 1 << 20
+
+
+class Resource(NamedTuple):
+    body: bytes
+    gzipped: bytes
+    etag: str
+    gzip_etag: str
+    content_type: str
+
+
+def _resource(body: bytes, mode: str) -> Resource:
+    # each representation has its own strong validator
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return Resource(body, gzip.compress(body, mtime=0), f'"{digest}"', f'"{digest}-gz"', CONTENT_TYPES[mode])
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Returns whether an Accept-Encoding header value allows a gzip response"""
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.lower()] = q
+    if "gzip" in qvalues:
+        return qvalues["gzip"] > 0
+    if "x-gzip" in qvalues:
+        return qvalues["x-gzip"] > 0
+    return qvalues.get("*", 0) > 0
+
+
+def _source_files(proc: YamlSchemaProcessor) -> set[Path]:
+    out = {proc.schema_fp.resolve()}
+    for other in proc.imports.values():
+        out |= _source_files(other)
+    return out
+
+
+class SchemaStore:
+    """In-memory split documents for one or more source documents
+
+    :param sources: source documents to serve
+    :param trusted: skip rule checks for sources that already passed
+    """
+
+    def __init__(self, sources: list[str | Path], trusted: bool = False):
+        self.sources = [Path(source) for source in sources]
+        self.trusted = trusted
+        self.resources: dict[str, Resource] = {}
+        self._mtimes: dict[Path, int] = {}
+        self.reload()
+
+    def build(self) -> tuple[dict[str, Resource], dict[Path, int]]:
+        """Processes the sources and returns their resources by path, with the
+        modification times of every source file read"""
+        resources = {}
+        watched = set()
+        for source in self.sources:
+            proc = YamlSchemaProcessor(source, trusted=self.trusted)
+            watched |= _source_files(proc)
+            kw = proc.schema_def_keyword
+            for cls in proc.for_js.get(kw) or {}:
+                if proc.class_is_protected(cls):
+                    continue
+                split_doc = prepare_split_doc(proc, cls)
+                body = json.dumps(split_doc.render("json"), indent=3, sort_keys=False).encode()
+                resources[proc.get_class_abs_path(cls, "json")] = _resource(body, "json")
+                body = yaml.dump(split_doc.render("yaml"), sort_keys=False).encode()
+                resources[proc.get_class_abs_path(cls, "yaml")] = _resource(body, "yaml")
+        return resources, {fp: fp.stat().st_mtime_ns for fp in watched}
+
+    def reload(self) -> None:
+        self.resources, self._mtimes = self.build()
+
+    def refresh(self) -> bool:
+        """Rebuilds if any source file changed, returning whether the resources were replaced"""
+        if not self.changed():
+            return False
+        try:
+            self.reload()
+        except Exception:
+            # do not retry broken sources until they are modified again
+            self._mtimes = {fp: fp.stat().st_mtime_ns for fp in self._mtimes if fp.exists()}
+            raise
+        return True
+
+    def changed(self) -> bool:
+        """Returns whether any source file has been modified since the last build"""
+        for fp, mtime in self._mtimes.items():
+            try:
+                if fp.stat().st_mtime_ns != mtime:
+                    return True
+            except FileNotFoundError:
+                return True
+        return False
+
+
+class SchemaServer:
+    """asyncio HTTP/1.1 server for a SchemaStore
+
+    :param store: schema store to serve
+    :param host: interface to bind
+    :param port: port to bind, 0 picks a free port
+    :param reload_interval: seconds between checks for source changes, 0 disables reloading
+    """
+
+    def __init__(self, store: SchemaStore, host: str = "127.0.0.1", port: int = 8000, reload_interval: float = 1.0):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.reload_interval = reload_interval
+        self._server = None
+        self._watcher = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.reload_interval:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await loop.run_in_executor(None, self.store.refresh)
+            except Exception as e:
+                # keep serving the last good build until the sources are fixed
+                print(f"reload failed: {e}", file=sys.stderr)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    writer.write(self._response(400, {}, b"", "HTTP/1.1", close=True))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                # request bodies are not used, but must be consumed before the next request
+                if "transfer-encoding" in headers:
+                    close = True
+                elif "content-length" in headers:
+                    try:
+                        length = int(headers["content-length"])
+                    except ValueError:
+                        length = -1
+                    if length < 0:
+                        writer.write(self._response(400, {}, b"", version, close=True))
+                        break
+                    if length > MAX_REQUEST_BODY:
+                        writer.write(self._response(413, {}, b"", version, close=True))
+                        break
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+                writer.write(self._respond(method, target, headers, version, close))
+                await writer.drain()
+                if close:
+                    break
+        finally:
+            writer.close()
+
+    def _respond(self, method: str, target: str, headers: dict[str, str], version: str, close: bool) -> bytes:
+        if method not in ("GET", "HEAD"):
+            return self._response(405, {"Allow": "GET, HEAD"}, b"", version, close)
+        resource = self.store.resources.get(target.split("?", 1)[0])
+        if resource is None:
+            return self._response(404, {}, b"", version, close)
+        gzipped = accepts_gzip(headers.get("accept-encoding", ""))
+        etag = resource.gzip_etag if gzipped else resource.etag
+        response_headers = {
+            "Content-Type": resource.content_type,
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or etag in tags:
+                return self._response(304, response_headers, b"", version, close)
+        body = resource.body
+        if gzipped:
+            body = resource.gzipped
+            response_headers["Content-Encoding"] = "gzip"
+        if method == "HEAD":
+            return self._response(200, response_headers, b"", version, close, content_length=len(body))
+        return self._response(200, response_headers, body, version, close)
+
+    @staticmethod
+    def _response(
+        status: int, headers: dict[str, str], body: bytes, version: str, close: bool, content_length: int | None = None
+    ) -> bytes:
+        if version not in ("HTTP/1.0", "HTTP/1.1"):
+            version = "HTTP/1.1"
+        lines = [f"{version} {status} {REASONS[status]}"]
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        if status != 304:
+            lines.append(f"Content-Length: {len(body) if content_length is None else content_length}")
+        if close:
+            lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        store = SchemaStore(args.infiles, trusted=args.trusted)
+        server = SchemaServer(store, host=args.host, port=args.port, reload_interval=args.reload_interval)
+
+        async def serve():
+            # the port is only known once bound, e.g. with --port 0
+            await server.start()
+            print(f"serving {len(store.resources)} documents on http://{args.host}:{server.port}", file=sys.stderr)
+            await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    cli()
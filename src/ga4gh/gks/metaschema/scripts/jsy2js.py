@@ -1,14 +1,151 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
+import multiprocessing
 import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import TextIO
 
 import yaml
 
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled, span
+
+# libyaml bindings are much faster when PyYAML was built with them
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# documents are sent to worker processes in batches of about this many characters
+BATCH_SIZE = 1 << 20
+
+parser = argparse.ArgumentParser(description="convert yaml on stdin to json on stdout")
+mode = parser.add_mutually_exclusive_group()
+mode.add_argument(
+    "--ndjson", action="store_true", help="convert each document of a multi-document YAML stream to a line of NDJSON"
+)
+mode.add_argument("--to-yaml", action="store_true", help="convert NDJSON to a multi-document YAML stream")
+parser.add_argument(
+    "-j", "--jobs", type=int, default=1, help="parse documents in this many processes (with --ndjson or --to-yaml)"
+)
+add_profile_arguments(parser)
+
+
+def _is_marker(line: str, marker: str) -> bool:
+    return line.startswith(marker) and (len(line) == 3 or line[3] in " \t\r\n")
+
+
+def iter_yaml_documents(stream: Iterable[str]) -> Iterator[str]:
+    """
+    Splits a multi-document YAML stream into the text of each document, on ``---``
+    and ``...`` marker lines, reading one line at a time
+
+    :param stream: YAML text stream
+    """
+    lines = []
+    has_content = False
+    for line in stream:
+        if _is_marker(line, "---"):
+            if has_content:
+                yield "".join(lines)
+                lines = []
+            lines.append(line)
+            has_content = True
+        elif _is_marker(line, "..."):
+            if has_content:
+                yield "".join(lines)
+            lines = []
+            has_content = False
+        else:
+            lines.append(line)
+            stripped = line.strip()
+            if stripped and not stripped.startswith(("#", "%")):
+                has_content = True
+    if has_content:
+        yield "".join(lines)
+
+
+def iter_ndjson_lines(stream: Iterable[str]) -> Iterator[str]:
+    """Yields the non-blank lines of an NDJSON stream"""
+    for line in stream:
+        if line.strip():
+            yield line
+
+
+def yaml_docs_to_ndjson(docs: list[str]) -> str:
+    """Converts the text of YAML documents to NDJSON lines"""
+    return "".join(json.dumps(yaml.load(doc, Loader=SafeLoader)) + "\n" for doc in docs)
+
+
+def ndjson_to_yaml_docs(lines: list[str]) -> str:
+    """Converts NDJSON lines to ``---`` separated YAML documents"""
+    docs = (json.loads(line) for line in lines)
+    return yaml.dump_all(docs, Dumper=SafeDumper, sort_keys=False, explicit_start=True, allow_unicode=True)
+
+
+def _batches(items: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    batch = []
+    size = 0
+    for item in items:
+        batch.append(item)
+        size += len(item)
+        if size >= batch_size:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def convert_stream(
+    items: Iterable[str],
+    convert: Callable[[list[str]], str],
+    out: TextIO,
+    jobs: int = 1,
+    batch_size: int = BATCH_SIZE,
+) -> None:
+    """
+    Converts a stream of documents in batches, writing results in input order. With
+    several jobs, at most two batches per process are in flight, so memory use does
+    not grow with the size of the input.
+
+    :param items: text of each input document
+    :param convert: module-level function converting a batch of documents to output text
+    :param out: output stream
+    :param jobs: number of worker processes, 1 converts in this process
+    :param batch_size: approximate number of characters per batch
+    """
+    batches = _batches(items, batch_size)
+    if jobs <= 1:
+        for batch in batches:
+            with span("convert_batch", documents=len(batch)):
+                out.write(convert(batch))
+        return
+    pending = deque()
+    # spawn rather than fork, which is unsafe once the executor has started its threads
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for batch in batches:
+            if len(pending) >= 2 * jobs:
+                out.write(pending.popleft().result())
+            pending.append(executor.submit(convert, batch))
+        while pending:
+            out.write(pending.popleft().result())
+
 
 def cli():
-    yaml_schema = yaml.load(sys.stdin, Loader=yaml.SafeLoader)
-    json.dump(yaml_schema, sys.stdout, indent=3)
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    if args.jobs != 1 and not (args.ndjson or args.to_yaml):
+        parser.error("--jobs requires --ndjson or --to-yaml")
+    with profiled(args):
+        if args.ndjson:
+            convert_stream(iter_yaml_documents(sys.stdin), yaml_docs_to_ndjson, sys.stdout, args.jobs)
+        elif args.to_yaml:
+            convert_stream(iter_ndjson_lines(sys.stdin), ndjson_to_yaml_docs, sys.stdout, args.jobs)
+        else:
+            yaml_schema = yaml.load(sys.stdin, Loader=SafeLoader)
+            json.dump(yaml_schema, sys.stdout, indent=3)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+from pathlib import Path
+
+from ga4gh.gks.metaschema.tools.bundle import SchemaBundler
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled, span
+from ga4gh.gks.metaschema.tools.sinks import FileSystemSink, OutputSink, open_sink
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+
+parser = argparse.ArgumentParser(description="write a self-contained JSON Schema document for each class")
+parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("--archive", help="write a zip or tar archive instead of individual files")
+parser.add_argument("--gzip", action="store_true", help="also write precompressed .gz files")
+add_profile_arguments(parser)
+
+
+def bundle_defs_to_js(root_proc: YamlSchemaProcessor, sink: OutputSink | None = None) -> None:
+    """Writes a bundled document for each class to the bundle target directory
+
+    :param root_proc: root YamlSchemaProcessor
+    :param sink: output sink, defaults to files alongside the source document
+    """
+    if sink is None:
+        sink = FileSystemSink(root_proc.schema_fp.parent)
+    bundler = SchemaBundler(root_proc)
+    for cls in bundler:
+        with span("bundle_class", schema_class=cls), sink.open(f"{root_proc.bundle_key}/{cls}") as f:
+            json.dump(bundler.bundle(cls), f, indent=3, sort_keys=False)
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        p = YamlSchemaProcessor(Path(args.infile), trusted=args.trusted)
+        with open_sink(p.schema_fp.parent, args.archive, args.gzip) as sink:
+            bundle_defs_to_js(p, sink)
+
+
+if __name__ == "__main__":
+    cli()
@@ -2,10 +2,13 @@
 import argparse
 from pathlib import Path
 
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
 from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
 
 parser = argparse.ArgumentParser()
 parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+add_profile_arguments(parser)
 
 
 def main(proc):
@@ -17,8 +20,10 @@ def main(proc):
 
 def cli():
     args = parser.parse_args()
-    p = YamlSchemaProcessor(Path(args.infile))
-    main(p)
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        p = YamlSchemaProcessor(Path(args.infile), trusted=args.trusted)
+        main(p)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import multiprocessing
+import sys
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TextIO
+
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled, span
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+from ga4gh.gks.metaschema.tools.synthetic import InstanceGenerator
+
+# instances generated per task, in this process or a worker
+CHUNK_SIZE = 1000
+
+parser = argparse.ArgumentParser(description="write random instances of the classes of a schema as NDJSON on stdout")
+parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("-n", "--count", type=int, default=100, help="instances per class (default: %(default)s)")
+parser.add_argument("--classes", nargs="+", metavar="CLASS", help="classes to generate, defaults to all")
+parser.add_argument("--seed", type=int, default=0, help="random seed (default: %(default)s)")
+parser.add_argument("-j", "--jobs", type=int, default=1, help="generate instances in this many processes")
+add_profile_arguments(parser)
+
+_generator: InstanceGenerator | None = None
+
+
+def _init_worker(snapshot, seed: int) -> None:
+    global _generator
+    _generator = InstanceGenerator(snapshot, seed)
+
+
+def _generate_chunk(generator: InstanceGenerator, cls: str, start: int, stop: int) -> str:
+    return "".join(json.dumps(instance) + "\n" for instance in generator.instances(cls, start, stop))
+
+
+def _generate_chunk_in_worker(cls: str, start: int, stop: int) -> str:
+    # the generator of a worker process is created once, by its initializer
+    return _generate_chunk(_generator, cls, start, stop)
+
+
+def _chunks(classes: list[str], count: int, chunk_size: int) -> Iterator[tuple[str, int, int]]:
+    for cls in classes:
+        for start in range(0, count, chunk_size):
+            yield cls, start, min(start + chunk_size, count)
+
+
+def write_instances(
+    root_proc,
+    out: TextIO,
+    count: int,
+    classes: list[str] | None = None,
+    seed: int = 0,
+    jobs: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Writes ``count`` random instances of each class as NDJSON, class by class. The
+    output depends only on the schema, classes, count and seed, not on the number of
+    jobs.
+
+    :param root_proc: processed YamlSchemaProcessor
+    :param out: output stream
+    :param count: instances per class
+    :param classes: classes to generate, defaults to all classes with their own documents
+    :param seed: random seed
+    :param jobs: number of worker processes, 1 generates in this process
+    :param chunk_size: instances generated per task
+    """
+    if classes is None:
+        classes = InstanceGenerator(root_proc).classes()
+    chunks = _chunks(classes, count, chunk_size)
+    if jobs <= 1:
+        generator = InstanceGenerator(root_proc, seed)
+        for cls, start, stop in chunks:
+            with span("generate_instances", schema_class=cls, start=start):
+                out.write(_generate_chunk(generator, cls, start, stop))
+        return
+    pending = deque()
+    # workers receive a picklable snapshot once, and only chunk bounds per task
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(root_proc.snapshot(), seed),
+    ) as executor:
+        for chunk in chunks:
+            if len(pending) >= 2 * jobs:
+                out.write(pending.popleft().result())
+            pending.append(executor.submit(_generate_chunk_in_worker, *chunk))
+        while pending:
+            out.write(pending.popleft().result())
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        p = YamlSchemaProcessor(Path(args.infile), trusted=args.trusted)
+        if args.classes:
+            unknown = set(args.classes) - set(p.for_js.get(p.schema_def_keyword) or {})
+            if unknown:
+                parser.error(f"unknown classes: {', '.join(sorted(unknown))}")
+        write_instances(p, sys.stdout, args.count, args.classes, args.seed, args.jobs)
+
+
+if __name__ == "__main__":
+    cli()
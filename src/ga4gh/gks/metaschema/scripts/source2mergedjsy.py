@@ -1,16 +1,44 @@
 #!/usr/bin/env python3
 
+import argparse
 import pathlib
 import sys
 
+from ga4gh.gks.metaschema.tools.dedupe import DEFAULT_MIN_SIZE, dump_yaml
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
+from ga4gh.gks.metaschema.tools.sinks import open_sink
 from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
 
+parser = argparse.ArgumentParser()
+parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("-o", "--outfile", help="file to write instead of stdout, relative to the archive if given")
+parser.add_argument("--archive", help="write the output file into a zip or tar archive")
+parser.add_argument("--gzip", action="store_true", help="also write a precompressed .gz file")
+parser.add_argument(
+    "--dedupe",
+    nargs="?",
+    type=int,
+    const=DEFAULT_MIN_SIZE,
+    metavar="MIN_SIZE",
+    help=f"share repeated subschemas of at least MIN_SIZE bytes (default {DEFAULT_MIN_SIZE}) as definitions",
+)
+add_profile_arguments(parser)
+
 
 def cli():
-    source_file = pathlib.Path(sys.argv[1])
-    p = YamlSchemaProcessor(source_file)
-    p.merge_imported()
-    p.js_yaml_dump(sys.stdout)
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        source_file = pathlib.Path(args.infile)
+        p = YamlSchemaProcessor(source_file, trusted=args.trusted)
+        p.merge_imported()
+        if args.outfile is None:
+            dump_yaml(p, sys.stdout, args.dedupe)
+            return
+        with open_sink(pathlib.Path.cwd(), args.archive, args.gzip) as sink:
+            with sink.open(args.outfile) as f:
+                dump_yaml(p, f, args.dedupe)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""compile a source document into an indexed schema pack"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import BinaryIO
+
+from ga4gh.gks.metaschema.scripts.source2splitjs import build_split_doc
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled
+from ga4gh.gks.metaschema.tools.schema_pack import HEADER, MAGIC
+from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+
+parser = argparse.ArgumentParser()
+parser.add_argument("infile")
+parser.add_argument("-o", "--outfile", help="pack file to write, defaults to <schema>.gkspack next to the source")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+add_profile_arguments(parser)
+
+
+def _encode(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), sort_keys=False).encode()
+
+
+def write_pack(proc: YamlSchemaProcessor, f: BinaryIO) -> None:
+    """Writes every class of a processed schema to a schema pack.
+
+    :param proc: root YamlSchemaProcessor
+    :param f: binary stream to write the pack to
+    """
+    kw = proc.schema_def_keyword
+    blobs = []
+    offset = 0
+
+    def add(data: bytes) -> list[int]:
+        nonlocal offset
+        blobs.append(data)
+        entry = [offset, len(data)]
+        offset += len(data)
+        return entry
+
+    document = {k: v for k, v in proc.for_js.items() if k != kw}
+    index = {"$id": proc.id, "schema_def_keyword": kw, "document": add(_encode(document)), "classes": {}}
+    for cls, cls_def in (proc.for_js.get(kw) or {}).items():
+        entry = {"for_js": add(_encode(cls_def))}
+        if not proc.class_is_protected(cls):
+            entry["split"] = add(_encode(build_split_doc(proc, cls)))
+        index["classes"][cls] = entry
+
+    index_data = _encode(index)
+    f.write(HEADER.pack(MAGIC, len(index_data)))
+    f.write(index_data)
+    for data in blobs:
+        f.write(data)
+
+
+def default_pack_path(proc: YamlSchemaProcessor) -> Path:
+    stem = proc.schema_fp.stem.removesuffix("-source")
+    return proc.schema_fp.parent / f"{stem}.gkspack"
+
+
+def cli():
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        p = YamlSchemaProcessor(Path(args.infile), trusted=args.trusted)
+        outfile = Path(args.outfile) if args.outfile else default_pack_path(p)
+        with open(outfile, "wb") as f:
+            write_pack(p, f)
+
+
+if __name__ == "__main__":
+    cli()
@@ -3,27 +3,43 @@
 import argparse
 import copy
 import json
-import os
 import re
 from pathlib import Path
 
+import yaml
+
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled, span
+from ga4gh.gks.metaschema.tools.shards import build_shards, plan_shards
+from ga4gh.gks.metaschema.tools.sinks import FileSystemSink, OutputSink, open_sink
 from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
 
 parser = argparse.ArgumentParser()
 parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("--mode", choices=["json", "yaml", "both"], default="json", help="split files to write")
+parser.add_argument("--archive", help="write a zip or tar archive instead of individual files")
+parser.add_argument("--gzip", action="store_true", help="also write precompressed .gz files")
+parser.add_argument(
+    "--shards", type=int, metavar="N", help="write N json documents grouping related classes instead of one per class"
+)
+add_profile_arguments(parser)
+
 
+frag_re = re.compile(r"(/\$defs|definitions)/(\w+)")
 
-def _redirect_refs(obj: dict | list, dest_path: Path, root_proc: YamlSchemaProcessor, mode: str) -> dict | list:
-    """Process the list of references and returns the list of classes
+
+def _redirect_refs(obj: dict | list, dest_path: Path, root_proc: YamlSchemaProcessor, refs: list) -> dict | list:
+    """Process the list of references and returns the list of classes. References to
+    split class documents are recorded in ``refs`` as ``(container, key, proc, class)``
+    so that their mode-dependent paths can be filled in later.
 
     :param obj: list of schema objects
     :param dest_path: destination output path
     :param root_proc: the root YamlSchemaProcessor
-    :param mode: output mode of "json" or "yaml"
+    :param refs: list collecting the references to fill in
     """
-    frag_re = re.compile(r"(/\$defs|definitions)/(\w+)")
     if isinstance(obj, list):
-        return [_redirect_refs(x, dest_path, root_proc, mode) for x in obj]
+        return [_redirect_refs(x, dest_path, root_proc, refs) for x in obj]
     elif isinstance(obj, dict):
         for k, v in obj.items():
             if k == "$ref":
@@ -59,59 +75,144 @@ def _redirect_refs(obj: dict | list, dest_path: Path, root_proc: YamlSchemaProce
                     if containing_class == dest_path.name:
                         obj[k] = f"#{fragment}"
                         return obj
-                obj[k] = proc.get_class_abs_path(ref_class, mode)
+                refs.append((obj, k, proc, ref_class))
             else:
-                obj[k] = _redirect_refs(v, dest_path, root_proc, mode)
+                obj[k] = _redirect_refs(v, dest_path, root_proc, refs)
         return obj
     else:
         return obj
 
 
-def split_defs_to_js(root_proc: YamlSchemaProcessor, mode: str = "json") -> None:
-    """Splits the classes defined in the schema into json files.
+class SplitDoc:
+    """Standalone document for a single class, built once and rendered for each output
+    mode. Rendering fills in the mode-dependent reference paths and ``$id`` in place,
+    so serialize each rendering before rendering the next mode.
+    """
+
+    def __init__(self, root_proc: YamlSchemaProcessor, cls: str, doc: dict, refs: list):
+        self.root_proc = root_proc
+        self.cls = cls
+        self.doc = doc
+        self.refs = refs
+
+    def render(self, mode: str) -> dict:
+        """Returns the document with references and ``$id`` for a mode of "json" or "yaml"."""
+        for container, key, proc, ref_class in self.refs:
+            container[key] = proc.get_class_abs_path(ref_class, mode)
+        self.doc["$id"] = self.root_proc.get_class_uri(self.cls, mode)
+        return self.doc
+
+
+def prepare_split_doc(root_proc: YamlSchemaProcessor, cls: str) -> SplitDoc:
+    """Builds the standalone document for a single class, independent of output mode.
 
     :param root_proc: root YamlSchemaProcessor
+    :param cls: name of the class to build
+    """
+    kw = root_proc.schema_def_keyword
+    target_path = Path(cls)
+    refs = []
+    def_dict = {}
+    for protected_cls in root_proc.has_protected_members.get(cls, ()):
+        if root_proc.raw_defs[protected_cls]["protectedClassOf"] == cls:
+            def_dict[protected_cls] = copy.deepcopy(root_proc.defs[protected_cls])
+    out_doc = {}
+    for k, v in root_proc.for_js.items():
+        if k != kw:
+            out_doc[k] = copy.deepcopy(v)
+        elif def_dict:
+            out_doc[kw] = _redirect_refs(def_dict, target_path, root_proc, refs)
+    class_def = copy.deepcopy(root_proc.for_js[kw][cls])
+    class_def = _redirect_refs(class_def, target_path, root_proc, refs)
+    out_doc.update(class_def)
+    # class-level references now live in out_doc
+    refs = [
+        (out_doc if container is class_def else container, k, proc, ref_cls) for container, k, proc, ref_cls in refs
+    ]
+    out_doc["title"] = cls
+    out_doc["$id"] = None
+    return SplitDoc(root_proc, cls, out_doc, refs)
+
+
+def build_split_doc(root_proc: YamlSchemaProcessor, cls: str, mode: str = "json") -> dict:
+    """Builds the standalone document for a single class, with references redirected
+    to the split class paths.
+
+    :param root_proc: root YamlSchemaProcessor
+    :param cls: name of the class to build
     :param mode: str, defaults to "json"
     """
-    if mode == "json":
-        fp = root_proc.json_fp
-    elif mode == "yaml":
-        fp = root_proc.yaml_fp
-    else:
+    if mode not in ("json", "yaml"):
         raise ValueError("mode must be json or yaml")
-    os.makedirs(fp, exist_ok=True)
+    return prepare_split_doc(root_proc, cls).render(mode)
+
+
+def split_defs_to_js(root_proc: YamlSchemaProcessor, mode: str = "json", sink: OutputSink | None = None) -> None:
+    """Splits the classes defined in the schema into json files, yaml files, or both
+    from a single pass over the classes.
+
+    :param root_proc: root YamlSchemaProcessor
+    :param mode: "json", "yaml" or "both", defaults to "json"
+    :param sink: output sink, defaults to files alongside the source document
+    """
+    if mode == "both":
+        modes = ["json", "yaml"]
+    elif mode in ("json", "yaml"):
+        modes = [mode]
+    else:
+        raise ValueError("mode must be json, yaml or both")
+    if sink is None:
+        sink = FileSystemSink(root_proc.schema_fp.parent)
+    keys = {"json": root_proc.json_key, "yaml": root_proc.yaml_key}
     kw = root_proc.schema_def_keyword
     for cls in root_proc.for_js[kw].keys():
         if root_proc.class_is_protected(cls):
             continue
-        class_def = copy.deepcopy(root_proc.for_js[kw][cls])
-        target_path = fp / f"{cls}"
-        out_doc = copy.deepcopy(root_proc.for_js)
-        if cls in root_proc.has_protected_members:
-            def_dict = {}
-            keep = False
-            for protected_cls in root_proc.has_protected_members[cls]:
-                if root_proc.raw_defs[protected_cls]["protectedClassOf"] == cls:
-                    def_dict[protected_cls] = copy.deepcopy(root_proc.defs[protected_cls])
-                    keep = True
-            if keep:
-                out_doc[kw] = _redirect_refs(def_dict, target_path, root_proc, mode)
-            else:
-                out_doc.pop(kw, None)
-        else:
-            out_doc.pop(kw, None)
-        class_def = _redirect_refs(class_def, target_path, root_proc, mode)
-        out_doc.update(class_def)
-        out_doc["title"] = cls
-        out_doc["$id"] = root_proc.get_class_uri(cls, mode)
-        with open(target_path, "w") as f:
-            json.dump(out_doc, f, indent=3, sort_keys=False)
+        with span("prepare_split_doc", schema_class=cls):
+            split_doc = prepare_split_doc(root_proc, cls)
+        for m in modes:
+            with span("write_split_doc", schema_class=cls, mode=m), sink.open(f"{keys[m]}/{cls}") as f:
+                out_doc = split_doc.render(m)
+                if m == "json":
+                    json.dump(out_doc, f, indent=3, sort_keys=False)
+                else:
+                    yaml.dump(out_doc, f, sort_keys=False)
+
+
+def shard_defs_to_js(root_proc: YamlSchemaProcessor, n: int, sink: OutputSink | None = None) -> list[list[str]]:
+    """Writes the classes defined in the schema into at most ``n`` json documents,
+    keeping classes that reference each other together, and a manifest mapping each
+    class to its document. Returns the classes of each shard.
+
+    :param root_proc: root YamlSchemaProcessor
+    :param n: number of shards
+    :param sink: output sink, defaults to files alongside the source document
+    """
+    if sink is None:
+        sink = FileSystemSink(root_proc.schema_fp.parent)
+    with span("plan_shards", shards=n):
+        shards = plan_shards(root_proc, n)
+    docs, manifest = build_shards(root_proc, shards)
+    for i, doc in enumerate(docs):
+        with span("write_shard", shard=i), sink.open(f"{root_proc.shard_key}/{i}") as f:
+            json.dump(doc, f, indent=3, sort_keys=False)
+    with sink.open(f"{root_proc.shard_key}/manifest") as f:
+        json.dump(manifest, f, indent=3, sort_keys=False)
+    return shards
 
 
 def cli():
     args = parser.parse_args()
-    p = YamlSchemaProcessor(Path(args.infile))
-    split_defs_to_js(p)
+    check_profile_arguments(parser, args)
+    if args.shards is not None and args.shards < 1:
+        parser.error("--shards must be at least 1")
+    with profiled(args):
+        p = YamlSchemaProcessor(Path(args.infile), trusted=args.trusted)
+        with open_sink(p.schema_fp.parent, args.archive, args.gzip) as sink:
+            if args.shards is not None:
+                shard_defs_to_js(p, args.shards, sink)
+            else:
+                split_defs_to_js(p, args.mode, sink)
 
 
 if __name__ == "__main__":
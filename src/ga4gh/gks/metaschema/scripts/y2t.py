@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 """convert input .yaml to .rst artifacts"""
 
+import argparse
 import os
 import pathlib
-import sys
-from io import TextIOWrapper
 from pathlib import Path
+from typing import TextIO
 
 from jinja2 import Environment, FileSystemLoader
 
+from ga4gh.gks.metaschema.tools.profiling import add_profile_arguments, check_profile_arguments, profiled, span
+from ga4gh.gks.metaschema.tools.sinks import FileSystemSink, OutputSink, open_sink
 from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
 
+parser = argparse.ArgumentParser()
+parser.add_argument("infile")
+parser.add_argument("--trusted", action="store_true", help="skip rule checks for sources that already passed")
+parser.add_argument("--archive", help="write a zip or tar archive instead of individual files")
+parser.add_argument("--gzip", action="store_true", help="also write precompressed .gz files")
+add_profile_arguments(parser)
+
 templates_dir = Path(__file__).resolve().parents[4] / "templates"
 env = Environment(loader=FileSystemLoader(templates_dir))
 
@@ -95,7 +104,7 @@ def get_ancestor_with_attributes(class_name: str, proc: YamlSchemaProcessor) ->
     return class_name
 
 
-def add_ga4gh_digest(class_definition: dict, f: TextIOWrapper) -> None:
+def add_ga4gh_digest(class_definition: dict, f: TextIO) -> None:
     """Add GA4GH Digest table
 
     Will only include this table if both ``prefix`` and ``inherent`` are provided
@@ -156,14 +165,17 @@ def resolve_flags(class_property_attributes: dict) -> str:
     return flags
 
 
-def main(proc_schema: YamlSchemaProcessor) -> None:
+def main(proc_schema: YamlSchemaProcessor, sink: OutputSink | None = None) -> None:
     """
     Generates the .rst file for each of the classes in the schema
 
     :param proc_schema: schema processor object
+    :param sink: output sink, defaults to files alongside the source document
     """
+    if sink is None:
+        sink = FileSystemSink(proc_schema.schema_fp.parent)
     for class_name, class_definition in proc_schema.defs.items():
-        with open(proc_schema.def_fp / (class_name + ".rst"), "w") as f:
+        with span("render_rst", schema_class=class_name), sink.open(f"{proc_schema.defs_key}/{class_name}.rst") as f:
             maturity = class_definition.get("maturity", "")
             template = env.get_template("maturity")
             if maturity == "draft":
@@ -227,12 +239,17 @@ def main(proc_schema: YamlSchemaProcessor) -> None:
 
 
 def cli():
-    source_file = pathlib.Path(sys.argv[1])
-    p = YamlSchemaProcessor(source_file)
-    os.makedirs(p.def_fp, exist_ok=True)
-    if p.defs is None:
-        exit(0)
-    main(p)
+    args = parser.parse_args()
+    check_profile_arguments(parser, args)
+    with profiled(args):
+        source_file = pathlib.Path(args.infile)
+        p = YamlSchemaProcessor(source_file, trusted=args.trusted)
+        if not args.archive:
+            os.makedirs(p.def_fp, exist_ok=True)
+        if p.defs is None:
+            exit(0)
+        with open_sink(p.schema_fp.parent, args.archive, args.gzip) as sink:
+            main(p, sink)
 
 
 if __name__ == "__main__":
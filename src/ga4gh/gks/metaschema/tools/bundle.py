@@ -0,0 +1,106 @@
+"""Self-contained per-class schema documents with their dependencies embedded
+
+Each class definition is rewritten once, with references pointing into the bundle's
+defs, and the dependency closure of each strongly connected component of the
+reference graph is computed once and shared by all of its classes. Bundles share
+these definitions, so copy a bundle before modifying it.
+"""
+
+from collections.abc import Iterator
+
+from ga4gh.gks.metaschema.tools.graph import strongly_connected_components
+from ga4gh.gks.metaschema.tools.refs import class_processors, resolve_ref
+
+
+class SchemaBundler:
+    """Builds bundled class documents for a processed schema and its imports
+
+    :param root_proc: root YamlSchemaProcessor
+    """
+
+    def __init__(self, root_proc):
+        self.root_proc = root_proc
+        self.kw = root_proc.schema_def_keyword
+        self._procs = class_processors(root_proc)
+        self._rewritten: dict[str, dict] = {}
+        self._deps: dict[str, list[str]] = {}
+        self._closures: dict[str, frozenset[str]] = {}
+
+    def _rewrite(self, node, deps: dict):
+        if isinstance(node, dict):
+            out = {}
+            for k, v in node.items():
+                if k == "$ref" and isinstance(v, str):
+                    target, _ = resolve_ref(v, self._procs)
+                    deps[target] = None
+                    out[k] = f"#/{self.kw}/{target}"
+                else:
+                    out[k] = self._rewrite(v, deps)
+            return out
+        elif isinstance(node, list):
+            return [self._rewrite(item, deps) for item in node]
+        return node
+
+    def definition(self, cls: str) -> dict:
+        """Returns the JSON Schema definition of a class with references rewritten to
+        point into the bundle defs"""
+        if cls not in self._rewritten:
+            proc = self._procs[cls]
+            deps = {}
+            self._rewritten[cls] = self._rewrite(proc.for_js[proc.schema_def_keyword][cls], deps)
+            self._deps[cls] = list(deps)
+        return self._rewritten[cls]
+
+    def dependencies(self, cls: str) -> list[str]:
+        """Returns the classes referenced directly by a class"""
+        self.definition(cls)
+        return self._deps[cls]
+
+    def closure(self, cls: str) -> frozenset[str]:
+        """Returns the classes reachable through references from a class, including the
+        class itself only if it is part of a reference cycle"""
+        if cls not in self._closures:
+            self._compute_closures(cls)
+        return self._closures[cls]
+
+    def _compute_closures(self, start: str) -> None:
+        # components come after everything they reference, whose closures are then known
+        for component in strongly_connected_components([start], self.dependencies, self._closures):
+            members = set(component)
+            cyclic = len(component) > 1 or component[0] in self._deps[component[0]]
+            reachable = set(members) if cyclic else set()
+            for member in component:
+                for w in self._deps[member]:
+                    if w not in members:
+                        reachable.add(w)
+                        reachable |= self._closures[w]
+            closure = frozenset(reachable)
+            for member in component:
+                self._closures[member] = closure
+
+    def bundle(self, cls: str) -> dict:
+        """Returns a self-contained document for a class of the root schema, with every
+        class it depends on (and its protected members) embedded in its defs
+
+        :param cls: name of the class
+        """
+        root_proc = self.root_proc
+        doc = {k: v for k, v in root_proc.for_js.items() if k != self.kw}
+        doc.update(self.definition(cls))
+        doc["title"] = cls
+        doc["$id"] = root_proc.get_class_uri(cls, "bundle")
+        embedded = set(self.closure(cls))
+        for protected_cls in root_proc.has_protected_members.get(cls, ()):
+            if root_proc.raw_defs[protected_cls]["protectedClassOf"] == cls:
+                embedded.add(protected_cls)
+                embedded |= self.closure(protected_cls)
+        if embedded:
+            doc[self.kw] = {dep: self.definition(dep) for dep in sorted(embedded)}
+        return doc
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over the classes of the root schema that are bundled"""
+        root_proc = self.root_proc
+        for cls in root_proc.for_js.get(self.kw) or {}:
+            if not root_proc.class_is_protected(cls):
+                yield cls
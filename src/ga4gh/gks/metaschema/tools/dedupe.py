@@ -0,0 +1,186 @@
+"""Sharing of identical property subschemas in single-document JSON Schema output
+
+Inheritance copies the same property definitions (and concretization the same
+``oneOf`` lists) into every concrete class. :func:`dedupe_subschemas` moves each
+subschema that occurs more than once, and is at least ``min_size`` bytes of canonical
+JSON, into a shared definition and replaces every occurrence with a ``$ref`` to it.
+References inside moved subschemas resolve against the same document, so validation
+is unchanged; subschemas that set their own base URI or anchors are never moved.
+"""
+
+import copy
+import hashlib
+import json
+import sys
+from collections import defaultdict
+from collections.abc import Callable
+from typing import NamedTuple, TextIO
+
+import yaml
+
+from ga4gh.gks.metaschema.tools.hashing import canonical_json
+
+DEFAULT_MIN_SIZE = 256
+
+# keywords that change how references inside a subschema resolve
+SCOPE_KEYWORDS = frozenset(["$id", "$anchor", "$dynamicAnchor", "$dynamicRef", "$recursiveAnchor", "$recursiveRef"])
+
+APPLICATORS = ("oneOf", "anyOf")
+
+
+class DedupeReport(NamedTuple):
+    """Shared definitions added, copies replaced and document sizes as indented JSON"""
+
+    shared: int
+    replaced: int
+    size_before: int
+    size_after: int
+
+    def __str__(self):
+        saved = self.size_before - self.size_after
+        percent = 100 * saved / self.size_before if self.size_before else 0.0
+        return (
+            f"shared {self.shared} subschemas in place of {self.replaced} copies: "
+            f"{self.size_before} -> {self.size_after} bytes ({percent:.1f}% smaller)"
+        )
+
+
+def _has_scope_keywords(node) -> bool:
+    if isinstance(node, dict):
+        return any(k in SCOPE_KEYWORDS or _has_scope_keywords(v) for k, v in node.items())
+    if isinstance(node, list):
+        return any(_has_scope_keywords(item) for item in node)
+    return False
+
+
+def _whole(node: dict) -> dict:
+    return node
+
+
+def _replace_whole(node: dict, ref: str) -> dict:
+    return {"$ref": ref}
+
+
+def _applicators(node: dict) -> dict | None:
+    # a node with its own $ref has no place for a reference to the shared applicators
+    if "$ref" in node:
+        return None
+    sub = {k: node[k] for k in APPLICATORS if k in node}
+    return sub or None
+
+
+def _replace_applicators(node: dict, ref: str) -> dict:
+    # the reference takes the place of the first applicator keyword
+    out = {}
+    for k, v in node.items():
+        if k in APPLICATORS:
+            out.setdefault("$ref", ref)
+        else:
+            out[k] = v
+    return out
+
+
+def _share(
+    defs: dict,
+    kw: str,
+    sites: list[tuple[dict, str, str]],
+    extract: Callable[[dict], dict | None],
+    replace: Callable[[dict, str], dict],
+    min_size: int,
+) -> tuple[int, int]:
+    groups = defaultdict(list)
+    for container, key, hint in sites:
+        node = container[key]
+        if not isinstance(node, dict):
+            continue
+        sub = extract(node)
+        if sub is None or _has_scope_keywords(sub):
+            continue
+        encoded = canonical_json(sub)
+        if len(encoded) >= min_size:
+            groups[encoded].append((container, key, hint, sub))
+    shared = replaced = 0
+    for encoded, members in groups.items():
+        if len(members) < 2:
+            continue
+        name = f"_{members[0][2]}_{hashlib.sha256(encoded).hexdigest()[:8]}"
+        defs[name] = members[0][3]
+        ref = f"#/{kw}/{name}"
+        for container, key, _, _ in members:
+            container[key] = replace(container[key], ref)
+        shared += 1
+        replaced += len(members)
+    return shared, replaced
+
+
+def dedupe_subschemas(
+    doc: dict, schema_def_keyword: str, min_size: int = DEFAULT_MIN_SIZE
+) -> tuple[dict, DedupeReport]:
+    """Returns a copy of a JSON Schema document with repeated property subschemas
+    moved into shared definitions, and a report of the savings.
+
+    :param doc: document, e.g. the ``for_js`` of a processor
+    :param schema_def_keyword: "$defs" or "definitions"
+    :param min_size: smallest subschema to share, in bytes of canonical JSON
+    """
+    doc = copy.deepcopy(doc)
+    size_before = len(json.dumps(doc, indent=3))
+    defs = doc.get(schema_def_keyword) or {}
+    kw = schema_def_keyword
+
+    def property_sites():
+        return [
+            (cls_def["properties"], prop, prop)
+            for cls_def in list(defs.values())
+            if isinstance(cls_def.get("properties"), dict)
+            for prop in cls_def["properties"]
+        ]
+
+    # whole property definitions first, then the item schemas of those left
+    shared, replaced = _share(defs, kw, property_sites(), _whole, _replace_whole, min_size)
+
+    def item_sites():
+        return [
+            (container[prop], "items", hint)
+            for container, prop, hint in property_sites()
+            if isinstance(container[prop], dict) and "items" in container[prop]
+        ]
+
+    counts = _share(defs, kw, item_sites(), _whole, _replace_whole, min_size)
+    shared, replaced = shared + counts[0], replaced + counts[1]
+    if kw == "$defs":
+        # from draft 2019-09, $ref applies alongside sibling keywords, so repeated
+        # oneOf/anyOf lists can be shared even where the rest of the property differs
+        sites = property_sites() + item_sites()
+        counts = _share(defs, kw, sites, _applicators, _replace_applicators, min_size)
+        shared, replaced = shared + counts[0], replaced + counts[1]
+    size_after = len(json.dumps(doc, indent=3))
+    return doc, DedupeReport(shared, replaced, size_before, size_after)
+
+
+def dump_deduped(proc, stream: TextIO, min_size: int = DEFAULT_MIN_SIZE) -> DedupeReport:
+    """Writes the JSON Schema of a processor as YAML with repeated subschemas shared,
+    like ``js_yaml_dump``, and returns the savings
+
+    :param proc: processed YamlSchemaProcessor
+    :param stream: output stream
+    :param min_size: smallest subschema to share, in bytes of canonical JSON
+    """
+    doc, report = dedupe_subschemas(proc.for_js, proc.schema_def_keyword, min_size)
+    yaml.dump(doc, stream, sort_keys=False)
+    return report
+
+
+def dump_yaml(proc, stream: TextIO, min_size: int | None = None) -> None:
+    """Writes the JSON Schema of a processor as YAML, optionally sharing repeated
+    subschemas and reporting the savings on stderr
+
+    :param proc: processed YamlSchemaProcessor
+    :param stream: output stream
+    :param min_size: smallest subschema to share, None to write as is
+    """
+    if min_size is None:
+        proc.js_yaml_dump(stream)
+        return
+    report = dump_deduped(proc, stream, min_size)
+    print(report, file=sys.stderr)
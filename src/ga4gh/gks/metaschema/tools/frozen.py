@@ -0,0 +1,74 @@
+"""Read-only dicts and lists for shared, immutable views of schema definitions"""
+
+import copy
+
+import yaml
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only")
+
+
+class FrozenDict(dict):
+    """A dict that cannot be modified. Deep copies are plain, mutable dicts."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {k: copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+class FrozenList(list):
+    """A list that cannot be modified. Deep copies are plain, mutable lists."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+def freeze(value, memo: dict | None = None):
+    """Returns a read-only copy of nested dicts, lists and sets. Objects shared in the
+    input are shared in the output.
+
+    :param value: value to freeze
+    :param memo: frozen values keyed by the id of their originals
+    """
+    if memo is None:
+        memo = {}
+    if isinstance(value, (dict, list, set)) and id(value) in memo:
+        return memo[id(value)]
+    if isinstance(value, dict):
+        frozen = FrozenDict({k: freeze(v, memo) for k, v in value.items()})
+    elif isinstance(value, list):
+        frozen = FrozenList(freeze(v, memo) for v in value)
+    elif isinstance(value, set):
+        frozen = frozenset(value)
+    else:
+        return value
+    memo[id(value)] = frozen
+    return frozen
+
+
+class FrozenDumper(yaml.Dumper):
+    """YAML dumper that writes frozen containers as plain mappings and sequences"""
+
+
+FrozenDumper.add_representer(FrozenDict, yaml.representer.SafeRepresenter.represent_dict)
+FrozenDumper.add_representer(FrozenList, yaml.representer.SafeRepresenter.represent_list)
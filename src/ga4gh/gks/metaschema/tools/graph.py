@@ -0,0 +1,55 @@
+"""Graph algorithms over class reference graphs"""
+
+from collections.abc import Callable, Collection, Iterable
+
+
+def strongly_connected_components(
+    starts: Iterable[str], successors: Callable[[str], Iterable[str]], done: Collection[str] = ()
+) -> list[list[str]]:
+    """Returns the strongly connected components reachable from the start nodes, each
+    after every component it has edges to (Tarjan's algorithm, without recursion).
+
+    :param starts: nodes to start from
+    :param successors: returns the nodes a node has edges to
+    :param done: nodes to skip, along with everything only reachable through them
+    """
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for start in starts:
+        if start in index or start in done:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(successors(start)))]
+        while work:
+            v, edges = work[-1]
+            for w in edges:
+                if w in done:
+                    continue
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(successors(w))))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        if w == v:
+                            break
+                    components.append(component[::-1])
+    return components
@@ -0,0 +1,14 @@
+"""Content hashes of JSON-compatible schema objects"""
+
+import hashlib
+import json
+
+
+def canonical_json(obj) -> bytes:
+    """Returns a key-order independent JSON encoding of an object"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def content_hash(obj) -> str:
+    """Returns a hex digest of the canonical JSON encoding of an object"""
+    return hashlib.sha256(canonical_json(obj)).hexdigest()
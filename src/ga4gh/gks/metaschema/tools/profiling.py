@@ -0,0 +1,206 @@
+"""Timing and allocation instrumentation for schema builds
+
+Build stages are wrapped in :func:`span`, which does nothing unless a
+:class:`Profiler` is active. An active profiler records the duration, self time
+(excluding nested spans) and, optionally, net memory allocated by each span, and
+passes every finished record to its hooks.
+
+The active profiler is shared by every thread of the process, so that work handed
+to executor threads is recorded, but spans nest separately in each thread and
+asyncio task.
+"""
+
+import argparse
+import cProfile
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import NamedTuple
+
+_active = None
+_activation_lock = threading.Lock()
+
+# open spans of the current thread or task, innermost last
+_open_spans: ContextVar[tuple] = ContextVar("open_spans", default=())
+
+
+class SpanRecord(NamedTuple):
+    name: str
+    attrs: dict
+    depth: int
+    duration: float
+    self_time: float
+    allocated: int | None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "attrs", "start", "children", "mem_start", "_token")
+
+    def __init__(self, profiler: "Profiler", name: str, attrs: dict):
+        self.profiler = profiler
+        self.name = name
+        self.attrs = attrs
+        self.children = 0.0
+
+    def __enter__(self):
+        profiler = self.profiler
+        self._token = _open_spans.set(_open_spans.get() + (self,))
+        self.mem_start = tracemalloc.get_traced_memory()[0] if profiler.track_memory else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        profiler = self.profiler
+        allocated = None
+        if self.mem_start is not None:
+            allocated = tracemalloc.get_traced_memory()[0] - self.mem_start
+        _open_spans.reset(self._token)
+        # spans opened under a previous profiler are not parents of this one
+        parents = [s for s in _open_spans.get() if s.profiler is profiler]
+        if parents:
+            parents[-1].children += duration
+        record = SpanRecord(self.name, self.attrs, len(parents), duration, duration - self.children, allocated)
+        with profiler._lock:
+            profiler.records.append(record)
+            for hook in profiler.hooks:
+                hook(record)
+        return False
+
+
+def _accumulate(table: dict, record: SpanRecord) -> None:
+    entry = table.setdefault(record.name, {"count": 0, "total": 0.0, "self": 0.0, "max": 0.0})
+    entry["count"] += 1
+    entry["total"] += record.duration
+    entry["self"] += record.self_time
+    entry["max"] = max(entry["max"], record.duration)
+    if record.allocated is not None:
+        entry["allocated"] = entry.get("allocated", 0) + record.allocated
+
+
+def span(name: str, **attrs):
+    """Returns a context manager recording a build stage when a profiler is active.
+
+    :param name: stage name, e.g. "process_schema_class"
+    :param attrs: details recorded with the span, e.g. ``schema_class``
+    """
+    if _active is None:
+        return NULL_SPAN
+    return _Span(_active, name, attrs)
+
+
+class Profiler:
+    """Collects span records while active. Use as a context manager, or call
+    :meth:`start` and :meth:`stop`.
+
+    :param track_memory: record net allocations per span with tracemalloc
+    :param hooks: callables receiving each finished SpanRecord
+    """
+
+    def __init__(self, track_memory: bool = False, hooks: list[Callable[[SpanRecord], None]] | None = None):
+        self.track_memory = track_memory
+        self.hooks = list(hooks or [])
+        self.records: list[SpanRecord] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self.elapsed = 0.0
+
+    def add_hook(self, hook: Callable[[SpanRecord], None]) -> None:
+        self.hooks.append(hook)
+
+    def start(self) -> None:
+        global _active
+        with _activation_lock:
+            if _active is not None:
+                raise RuntimeError("another profiler is already active")
+            if self.track_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._t0 = time.perf_counter()
+            _active = self
+
+    def stop(self) -> None:
+        global _active
+        with _activation_lock:
+            if _active is self:
+                _active = None
+        self.elapsed += time.perf_counter() - self._t0
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def report(self) -> dict:
+        """Returns totals per stage and per class, in seconds and bytes"""
+        stages = {}
+        classes = {}
+        for record in self.records:
+            _accumulate(stages, record)
+            schema_class = record.attrs.get("schema_class")
+            if schema_class is not None:
+                _accumulate(classes.setdefault(schema_class, {}), record)
+        return {"elapsed": self.elapsed, "stages": stages, "classes": classes}
+
+    def write_report(self, fp: str | Path) -> None:
+        with open(fp, "w") as f:
+            json.dump(self.report(), f, indent=3)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the profiling options shared by all scripts"""
+    parser.add_argument("--profile", metavar="REPORT", help="write per-stage and per-class timings as JSON")
+    parser.add_argument("--profile-memory", action="store_true", help="include tracemalloc allocations in --profile")
+    parser.add_argument("--cprofile", metavar="STATS", help="write cProfile statistics")
+
+
+def check_profile_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Rejects profiling options that have no effect on their own"""
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory requires --profile")
+
+
+@contextmanager
+def profiled(args: argparse.Namespace) -> Iterator[Profiler | None]:
+    """Profiles the enclosed block as requested by the profiling options, writing
+    reports on exit (including ``sys.exit``)."""
+    if not args.profile and not args.cprofile:
+        yield None
+        return
+    profiler = Profiler(track_memory=args.profile_memory)
+    stats = cProfile.Profile() if args.cprofile else None
+    profiler.start()
+    if stats is not None:
+        stats.enable()
+    try:
+        yield profiler
+    finally:
+        if stats is not None:
+            stats.disable()
+            stats.dump_stats(args.cprofile)
+        profiler.stop()
+        if args.profile:
+            profiler.write_report(args.profile)
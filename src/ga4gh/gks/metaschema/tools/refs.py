@@ -0,0 +1,51 @@
+"""References between the JSON Schema classes of a schema and its imports"""
+
+import re
+from collections.abc import Iterator
+
+frag_re = re.compile(r"/(?:\$defs|definitions)/(\w+)$")
+
+
+def class_processors(root_proc, out: dict | None = None) -> dict:
+    """Maps the JSON Schema classes of a schema and its imports to the processor
+    defining them, preferring the root schema
+
+    :param root_proc: root YamlSchemaProcessor
+    """
+    if out is None:
+        out = {}
+    for cls in root_proc.for_js.get(root_proc.schema_def_keyword) or {}:
+        out.setdefault(cls, root_proc)
+    for other in root_proc.imports.values():
+        class_processors(other, out)
+    return out
+
+
+def resolve_ref(ref: str, processors: dict) -> tuple:
+    """Returns the class a reference points to and the processor defining it
+
+    :param ref: a ``$ref`` value
+    :param processors: classes mapped to processors, from :func:`class_processors`
+    """
+    path, _, fragment = ref.partition("#")
+    if fragment:
+        m = frag_re.search(fragment)
+        target = m.group(1) if m else None
+    else:
+        target = path.rstrip("/").split("/")[-1].split(".")[0]
+    if target not in processors:
+        raise ValueError(f"Could not find {ref} in processors")
+    return target, processors[target]
+
+
+def iter_refs(node) -> Iterator[str]:
+    """Iterates over the ``$ref`` values in a JSON Schema node and its subschemas"""
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == "$ref" and isinstance(v, str):
+                yield v
+            else:
+                yield from iter_refs(v)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_refs(item)
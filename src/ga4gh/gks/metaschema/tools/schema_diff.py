@@ -0,0 +1,84 @@
+"""Structural diff between two processed schemas, comparing content hashes before descending"""
+
+from ga4gh.gks.metaschema.tools.hashing import content_hash
+
+DETAILED_KEYS = {"properties", "heritableProperties", "required", "heritableRequired", "maturity", "ga4gh"}
+
+
+class SchemaDigest:
+    """Content hashes of the processed and for_js forms of every class in a schema.
+    Class hashes are computed up front; key and property hashes only on request.
+
+    :param proc: a processed YamlSchemaProcessor
+    """
+
+    def __init__(self, proc):
+        kw = proc.schema_def_keyword
+        self.processed = proc.defs or {}
+        self.for_js = proc.for_js.get(kw) or {}
+        self.class_hashes = {
+            cls: content_hash([cls_def, self.for_js.get(cls)]) for cls, cls_def in self.processed.items()
+        }
+
+    def key_hashes(self, cls: str) -> dict[str, str]:
+        processed = self.processed[cls]
+        for_js = self.for_js.get(cls, {})
+        return {key: content_hash([processed.get(key), for_js.get(key)]) for key in processed.keys() | for_js.keys()}
+
+    def properties(self, cls: str) -> dict[str, dict]:
+        cls_def = self.processed[cls]
+        return cls_def.get("properties", cls_def.get("heritableProperties", {}))
+
+    def required(self, cls: str) -> set[str]:
+        cls_def = self.processed[cls]
+        return set(cls_def.get("required", cls_def.get("heritableRequired", [])))
+
+    def property_hash(self, cls: str, prop: str) -> str:
+        js_props = self.for_js.get(cls, {}).get("properties", {})
+        return content_hash([self.properties(cls)[prop], js_props.get(prop)])
+
+
+def _diff_class(old: SchemaDigest, new: SchemaDigest, cls: str) -> dict:
+    change = {}
+    old_props, new_props = old.properties(cls), new.properties(cls)
+    added = [p for p in new_props if p not in old_props]
+    removed = [p for p in old_props if p not in new_props]
+    changed = [p for p in new_props if p in old_props and old.property_hash(cls, p) != new.property_hash(cls, p)]
+    if added:
+        change["added_properties"] = added
+    if removed:
+        change["removed_properties"] = removed
+    if changed:
+        change["changed_properties"] = changed
+    old_req, new_req = old.required(cls), new.required(cls)
+    if old_req != new_req:
+        change["required"] = {"added": sorted(new_req - old_req), "removed": sorted(old_req - new_req)}
+    for key in ("maturity", "ga4gh"):
+        old_value, new_value = old.processed[cls].get(key), new.processed[cls].get(key)
+        if old_value != new_value:
+            change[key] = [old_value, new_value]
+    old_keys, new_keys = old.key_hashes(cls), new.key_hashes(cls)
+    other = sorted(k for k in (old_keys.keys() | new_keys.keys()) - DETAILED_KEYS if old_keys.get(k) != new_keys.get(k))
+    if other:
+        change["changed_attributes"] = other
+    return change
+
+
+def diff_schemas(old_proc, new_proc) -> dict:
+    """Returns the classes added, removed and changed between two processed schemas.
+    Changed classes map to their added, removed and changed properties, required
+    property changes, maturity and ga4gh changes, and any other changed attributes.
+
+    :param old_proc: processor for the earlier schema version
+    :param new_proc: processor for the later schema version
+    """
+    old, new = SchemaDigest(old_proc), SchemaDigest(new_proc)
+    report = {
+        "added_classes": [cls for cls in new.class_hashes if cls not in old.class_hashes],
+        "removed_classes": [cls for cls in old.class_hashes if cls not in new.class_hashes],
+        "changed_classes": {},
+    }
+    for cls, class_hash in new.class_hashes.items():
+        if cls in old.class_hashes and old.class_hashes[cls] != class_hash:
+            report["changed_classes"][cls] = _diff_class(old, new, cls)
+    return report
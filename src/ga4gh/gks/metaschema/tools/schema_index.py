@@ -0,0 +1,217 @@
+"""Queryable index of the classes, properties and references of a processed schema"""
+
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+from ga4gh.gks.metaschema.tools.refs import iter_refs
+
+
+class ClassRecord(NamedTuple):
+    name: str
+    maturity: str | None
+    abstract: bool
+    protected_class_of: str | None
+    inherits: str | None
+    ga4gh_prefix: str | None
+    inherent: tuple[str, ...]
+    description: str | None
+
+
+class PropertyRecord(NamedTuple):
+    schema_class: str
+    name: str
+    type: str | None
+    required: bool
+    description: str | None
+
+
+class RefEdge(NamedTuple):
+    """A reference from a class (and property, unless a class-level reference) to a target class"""
+
+    source: str
+    property: str | None
+    ref: str
+    target: str
+    target_schema: str | None
+
+
+def _defining_schemas(proc, out: dict[str, str] | None = None) -> dict[str, str]:
+    # maps class names to the id of the schema defining them, preferring the root schema
+    if out is None:
+        out = {}
+    for cls in proc.defs or {}:
+        out.setdefault(cls, proc.id)
+    for other in proc.imports.values():
+        _defining_schemas(other, out)
+    return out
+
+
+class SchemaIndex:
+    """Lookup tables derived from the processed definitions of a YamlSchemaProcessor.
+
+    Build with :meth:`from_processor`, or use ``YamlSchemaProcessor.index``.
+    """
+
+    def __init__(self, schema_id: str):
+        self.schema_id = schema_id
+        self.classes: dict[str, ClassRecord] = {}
+        self.class_properties: dict[str, dict[str, PropertyRecord]] = {}
+        self.property_classes: dict[str, list[str]] = defaultdict(list)
+        self.refs: dict[str, list[RefEdge]] = defaultdict(list)
+        self.reverse_refs: dict[str, list[RefEdge]] = defaultdict(list)
+        self._defined_in: dict[str, str] = {}
+
+    @classmethod
+    def from_processor(cls, proc) -> "SchemaIndex":
+        index = cls(proc.id)
+        index._defined_in = _defining_schemas(proc)
+        for schema_class, cls_def in (proc.defs or {}).items():
+            index._add_class(proc, schema_class, cls_def)
+        return index
+
+    def _add_class(self, proc, schema_class: str, cls_def: dict) -> None:
+        ga4gh = cls_def.get("ga4gh", {})
+        self.classes[schema_class] = ClassRecord(
+            name=schema_class,
+            maturity=cls_def.get("maturity"),
+            abstract=proc.class_is_abstract(schema_class),
+            protected_class_of=cls_def.get("protectedClassOf"),
+            inherits=cls_def.get("inherits"),
+            ga4gh_prefix=ga4gh.get("prefix"),
+            inherent=tuple(ga4gh.get("inherent", [])),
+            description=cls_def.get("description"),
+        )
+        if "heritableProperties" in cls_def:
+            prop_k, req_k = "heritableProperties", "heritableRequired"
+        else:
+            prop_k, req_k = "properties", "required"
+        required = set(cls_def.get(req_k, []))
+        properties = {}
+        for prop, prop_def in cls_def.get(prop_k, {}).items():
+            prop_type = prop_def.get("type")
+            if isinstance(prop_type, list):
+                prop_type = " | ".join(prop_type)
+            properties[prop] = PropertyRecord(
+                schema_class=schema_class,
+                name=prop,
+                type=prop_type,
+                required=prop in required,
+                description=prop_def.get("description"),
+            )
+            self.property_classes[prop].append(schema_class)
+            self._add_refs(schema_class, prop, prop_def)
+        self.class_properties[schema_class] = properties
+        for key in ("oneOf", "anyOf", "allOf"):
+            if key in cls_def:
+                self._add_refs(schema_class, None, cls_def[key])
+
+    def _remove_class(self, schema_class: str) -> None:
+        self.classes.pop(schema_class, None)
+        for prop in self.class_properties.pop(schema_class, {}):
+            self.property_classes[prop].remove(schema_class)
+        for edge in self.refs.pop(schema_class, []):
+            self.reverse_refs[edge.target].remove(edge)
+
+    def refresh(self, proc, classes) -> None:
+        """Re-indexes classes after they were reprocessed, dropping classes no longer defined.
+
+        :param proc: the YamlSchemaProcessor the index was built from
+        :param classes: names of the reprocessed classes
+        """
+        classes = set(classes)
+        for schema_class in classes:
+            self._remove_class(schema_class)
+        for schema_class in [cls for cls in proc.defs or {} if cls in classes]:
+            self._defined_in.setdefault(schema_class, proc.id)
+            self._add_class(proc, schema_class, proc.defs[schema_class])
+
+    def _add_refs(self, schema_class: str, prop: str | None, node) -> None:
+        for ref in dict.fromkeys(iter_refs(node)):
+            target = ref.split("/")[-1]
+            edge = RefEdge(schema_class, prop, ref, target, self._defined_in.get(target))
+            self.refs[schema_class].append(edge)
+            self.reverse_refs[target].append(edge)
+
+    def referrers(self, target: str) -> list[RefEdge]:
+        """Returns the references made to a class"""
+        return self.reverse_refs.get(target, [])
+
+    def classes_defining(self, prop: str) -> list[str]:
+        """Returns the classes that define (or inherit) a property"""
+        return self.property_classes.get(prop, [])
+
+    def inherent(self, schema_class: str) -> tuple[str, ...]:
+        """Returns the ``ga4gh.inherent`` properties of a class"""
+        return self.classes[schema_class].inherent
+
+    def to_sqlite(self, path: str | Path) -> None:
+        """Exports the index to an SQLite database, replacing any existing tables.
+
+        :param path: database file to write
+        """
+        con = sqlite3.connect(path)
+        with con:
+            con.executescript(
+                """
+                DROP TABLE IF EXISTS classes;
+                DROP TABLE IF EXISTS properties;
+                DROP TABLE IF EXISTS inherent;
+                DROP TABLE IF EXISTS refs;
+                CREATE TABLE classes (
+                    name TEXT PRIMARY KEY,
+                    maturity TEXT,
+                    abstract INTEGER NOT NULL,
+                    protected_class_of TEXT,
+                    inherits TEXT,
+                    ga4gh_prefix TEXT,
+                    description TEXT
+                );
+                CREATE TABLE properties (
+                    class TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    type TEXT,
+                    required INTEGER NOT NULL,
+                    description TEXT,
+                    PRIMARY KEY (class, name)
+                );
+                CREATE TABLE inherent (class TEXT NOT NULL, property TEXT NOT NULL, PRIMARY KEY (class, property));
+                CREATE TABLE refs (
+                    source TEXT NOT NULL,
+                    property TEXT,
+                    ref TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    target_schema TEXT
+                );
+                CREATE INDEX classes_maturity ON classes (maturity);
+                CREATE INDEX classes_inherits ON classes (inherits);
+                CREATE INDEX properties_name ON properties (name);
+                CREATE INDEX refs_source ON refs (source);
+                CREATE INDEX refs_target ON refs (target);
+                """
+            )
+            con.executemany(
+                "INSERT INTO classes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (r.name, r.maturity, r.abstract, r.protected_class_of, r.inherits, r.ga4gh_prefix, r.description)
+                    for r in self.classes.values()
+                ],
+            )
+            con.executemany(
+                "INSERT INTO properties VALUES (?, ?, ?, ?, ?)",
+                [
+                    (p.schema_class, p.name, p.type, p.required, p.description)
+                    for props in self.class_properties.values()
+                    for p in props.values()
+                ],
+            )
+            con.executemany(
+                "INSERT INTO inherent VALUES (?, ?)",
+                [(r.name, prop) for r in self.classes.values() for prop in r.inherent],
+            )
+            con.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?, ?, ?)",
+                [tuple(edge) for edges in self.refs.values() for edge in edges],
+            )
+        con.close()
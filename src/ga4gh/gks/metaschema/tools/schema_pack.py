@@ -0,0 +1,123 @@
+"""Read-only loader for compiled schema packs
+
+A schema pack holds the ``for_js`` definition and the split document of every class
+in a single file::
+
+    MAGIC | index length (uint64, little endian) | index (JSON) | class documents (JSON)
+
+The index maps each class to the offset and length of its documents, so a pack can
+be memory-mapped and individual classes decoded on demand. Mapped pages are shared
+between every process that opens the same pack.
+"""
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+
+MAGIC = b"GKSPACK\x01"
+HEADER = struct.Struct("<8sQ")
+
+
+class SchemaPackError(ValueError):
+    """Raised when a file is not a valid schema pack"""
+
+
+class SchemaPack:
+    """Lazily decoded view over a schema pack file
+
+    :param path: path to a pack written by ``source2pack``
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            # empty files cannot be mapped, so check the size first
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise SchemaPackError(f"{self.path} is too short to be a schema pack")
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_index()
+        except BaseException:
+            self._buf.close()
+            raise
+
+    def _read_index(self) -> None:
+        magic, index_len = HEADER.unpack_from(self._buf)
+        if magic != MAGIC:
+            raise SchemaPackError(f"{self.path} is not a schema pack")
+        self._data_start = HEADER.size + index_len
+        if self._data_start > len(self._buf):
+            raise SchemaPackError(f"{self.path} is truncated")
+        try:
+            index = json.loads(self._buf[HEADER.size : self._data_start])
+            self.id = index["$id"]
+            self.schema_def_keyword = index["schema_def_keyword"]
+            self._document = index["document"]
+            self._classes = index["classes"]
+            entries = [self._document]
+            for cls_entries in self._classes.values():
+                entries.append(cls_entries["for_js"])
+                if "split" in cls_entries:
+                    entries.append(cls_entries["split"])
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise SchemaPackError(f"{self.path} has an invalid index: {e}") from e
+        # every document must lie within the data region
+        data_len = len(self._buf) - self._data_start
+        for entry in entries:
+            if not (
+                isinstance(entry, list)
+                and len(entry) == 2
+                and all(type(n) is int and n >= 0 for n in entry)
+                and entry[0] + entry[1] <= data_len
+            ):
+                raise SchemaPackError(f"{self.path} is truncated or has an invalid index entry {entry!r}")
+
+    def __reduce__(self):
+        # workers re-map the file rather than copying its contents
+        return (self.__class__, (self.path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._buf.close()
+
+    def __contains__(self, cls: str) -> bool:
+        return cls in self._classes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._classes)
+
+    def __len__(self) -> int:
+        return len(self._classes)
+
+    def _decode(self, entry: list[int]):
+        offset, length = entry
+        start = self._data_start + offset
+        try:
+            return json.loads(self._buf[start : start + length])
+        except ValueError as e:
+            raise SchemaPackError(f"{self.path} has an invalid document at offset {offset}: {e}") from e
+
+    def get(self, cls: str) -> dict:
+        """Returns a newly decoded ``for_js`` definition of a class"""
+        return self._decode(self._classes[cls]["for_js"])
+
+    def get_split(self, cls: str) -> dict:
+        """Returns a newly decoded split document of a class, as written by ``source2splitjs``"""
+        entry = self._classes[cls].get("split")
+        if entry is None:
+            raise KeyError(f"{cls} has no split document")
+        return self._decode(entry)
+
+    def document(self) -> dict:
+        """Returns the complete ``for_js`` document, decoding every class"""
+        doc = self._decode(self._document)
+        doc[self.schema_def_keyword] = {cls: self.get(cls) for cls in self._classes}
+        return doc
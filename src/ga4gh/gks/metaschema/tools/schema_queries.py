@@ -0,0 +1,152 @@
+"""Read-only queries shared by schema processors and their snapshots"""
+
+import json
+from functools import cached_property
+from pathlib import Path
+from urllib.parse import urlparse
+
+import yaml
+
+from ga4gh.gks.metaschema.tools.frozen import FrozenDumper
+from ga4gh.gks.metaschema.tools.profiling import span
+from ga4gh.gks.metaschema.tools.schema_index import SchemaIndex
+from ga4gh.gks.metaschema.tools.validation import validate
+
+# lazily built attributes of SchemaQueries, stored in the instance __dict__
+CACHED_ATTRIBUTES = ("index",)
+
+
+class SchemaQueries:
+    """Class lookups over the raw, processed and JSON Schema definitions of a schema.
+
+    Subclasses provide the schema attributes (``raw_schema``, ``defs``, ``for_js``,
+    ``has_children`` and so on) and ``process_schema_class``. The derived ``index``
+    is built on first use and cached in the instance ``__dict__``, where processors
+    discard it with :meth:`_discard_cached` when reprocessing.
+    """
+
+    @cached_property
+    def index(self):
+        return SchemaIndex.from_processor(self)
+
+    def _discard_cached(self):
+        for name in CACHED_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+
+    def get_all_descendants(self, cls):
+        out = set()
+        for descendant in self.has_children.get(cls, []):
+            out.add(descendant)
+            out.update(self.get_all_descendants(descendant))
+        return out
+
+    def validate(self, classes=None):
+        return validate(self, classes)
+
+    def class_is_abstract(self, schema_class):
+        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
+        return "properties" not in schema_class_def and not self.class_is_primitive(schema_class)
+
+    def class_is_container(self, schema_class):
+        cls_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
+        return self.class_is_abstract(schema_class) and ("oneOf" in cls_def or "anyOf" in cls_def or "allOf" in cls_def)
+
+    def class_is_protected(self, schema_class):
+        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
+        return "protectedClassOf" in schema_class_def
+
+    def class_is_ga4gh_identifiable(self, schema_class):
+        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
+        return "ga4gh" in schema_class_def and "prefix" in schema_class_def["ga4gh"]
+
+    def class_is_passthrough(self, schema_class):
+        if not self.class_is_abstract(schema_class):
+            return False
+        raw_class_definition, _ = self.get_local_or_inherited_class(schema_class, raw=True)
+        if (
+            "heritableProperties" not in raw_class_definition
+            and "properties" not in raw_class_definition
+            and raw_class_definition.get("inherits", False)
+        ):
+            return True
+        return False
+
+    def class_is_primitive(self, schema_class):
+        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
+        schema_class_type = schema_class_def.get("type", "abstract")
+        if schema_class_type not in ["abstract", "object"]:
+            return True
+        return False
+
+    def class_is_subclass(self, schema_class, parent_class):
+        schema_class_fragment = f"#/{self.schema_def_keyword}/{schema_class}"
+        parent_class_fragment = f"#/{self.schema_def_keyword}/{parent_class}"
+        children = self.concretize_class_ref(parent_class_fragment)
+        return schema_class_fragment in children
+
+    def js_json_dump(self, stream):
+        with span("js_json_dump"):
+            json.dump(self.for_js, stream, indent=3, sort_keys=False)
+
+    def js_yaml_dump(self, stream):
+        with span("js_yaml_dump"):
+            yaml.dump(self.for_js, stream, sort_keys=False, Dumper=FrozenDumper)
+
+    def resolve_curie(self, curie):
+        namespace, identifier = curie.split(":")
+        base_url = self.namespaces[namespace]
+        return base_url + identifier
+
+    def get_local_or_inherited_class(self, schema_class, raw=False):
+        components = schema_class.split(":")
+        if len(components) == 1:
+            inherited_class_name = components[0]
+            if raw:
+                inherited_class = self.raw_schema[self.schema_def_keyword][inherited_class_name]
+            else:
+                self.process_schema_class(inherited_class_name)
+                inherited_class = self.processed_schema[self.schema_def_keyword][inherited_class_name]
+            proc = self
+        elif len(components) == 2:
+            inherited_class_name = components[1]
+            proc = self.imports[components[0]]
+            if raw:
+                inherited_class = proc.raw_schema[proc.schema_def_keyword][inherited_class_name]
+            else:
+                inherited_class = proc.processed_schema[proc.schema_def_keyword][inherited_class_name]
+        else:
+            raise ValueError
+        return inherited_class, proc
+
+    def get_class_uri(self, schema_class, mode):
+        abs_path = self.get_class_abs_path(schema_class, mode)
+        parsed_url = urlparse(self.id)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}{abs_path}"
+
+    def get_class_abs_path(self, schema_class, mode):
+        if mode == "json":
+            export_key = self.json_key
+        elif mode == "yaml":
+            export_key = self.yaml_key
+        elif mode == "bundle":
+            export_key = self.bundle_key
+        else:
+            raise ValueError("mode must be json, yaml or bundle")
+        if self.class_is_protected(schema_class):
+            frag_containing_class = self.raw_defs[schema_class]["protectedClassOf"]
+            class_ref = f"{frag_containing_class}#/{self.schema_def_keyword}/{schema_class}"
+        else:
+            class_ref = schema_class
+        parsed_url = urlparse(self.id)
+        parsed_id_path = parsed_url.path
+        revised_path = Path(parsed_id_path).parent.joinpath(export_key, class_ref)
+        return str(revised_path)
+
+    def concretize_class_ref(self, cls_url):
+        children = self.has_children_urls.get(cls_url, None)
+        if children is None:
+            return {cls_url}
+        out = set()
+        for child in children:
+            out.update(self.concretize_class_ref(child))
+        return out
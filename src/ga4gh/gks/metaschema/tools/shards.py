@@ -0,0 +1,172 @@
+"""Grouping of the classes of a schema into a fixed number of shard documents
+
+Classes that reference each other in a cycle, and protected classes with the class
+containing them, always share a shard. These groups are then merged greedily,
+strongest affinity per byte first, where affinity counts the references between
+groups and, fractionally, references made to both from the same class. Merges that
+would make a shard much larger than an even split are only made when no other merge
+remains.
+"""
+
+import copy
+import json
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlparse
+
+from ga4gh.gks.metaschema.tools.graph import strongly_connected_components
+from ga4gh.gks.metaschema.tools.refs import class_processors, iter_refs, resolve_ref
+
+# largest shard size allowed by preferred merges, relative to an even split
+BALANCE = 1.25
+
+
+def class_dependencies(root_proc) -> dict[str, list[str]]:
+    """Returns the classes of the root schema that each of its JSON Schema classes
+    references or inherits from"""
+    kw = root_proc.schema_def_keyword
+    js_defs = root_proc.for_js.get(kw) or {}
+    processors = class_processors(root_proc)
+    deps = {}
+    for cls, cls_def in js_defs.items():
+        targets = {}
+        for ref in iter_refs(cls_def):
+            target, proc = resolve_ref(ref, processors)
+            if proc is root_proc:
+                targets[target] = None
+        parent = root_proc.raw_defs.get(cls, {}).get("inherits")
+        if parent in js_defs:
+            targets[parent] = None
+        deps[cls] = list(targets)
+    return deps
+
+
+def plan_shards(root_proc, n: int) -> list[list[str]]:
+    """Groups the JSON Schema classes of the root schema into at most ``n`` shards.
+    Shards and their classes are in the order of the schema.
+
+    :param root_proc: root YamlSchemaProcessor
+    :param n: number of shards
+    """
+    if n < 1:
+        raise ValueError("number of shards must be at least 1")
+    kw = root_proc.schema_def_keyword
+    js_defs = root_proc.for_js.get(kw) or {}
+    order = {cls: i for i, cls in enumerate(js_defs)}
+    deps = class_dependencies(root_proc)
+
+    # cycles and protected classes with their containing classes are never split
+    unit_of = {}
+    for i, component in enumerate(strongly_connected_components(js_defs, deps.__getitem__)):
+        for cls in component:
+            unit_of[cls] = i
+    parent = list(range(len(set(unit_of.values()))))
+
+    def find(u):
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    for cls in js_defs:
+        container = root_proc.raw_defs.get(cls, {}).get("protectedClassOf")
+        if container in unit_of:
+            a, b = find(unit_of[cls]), find(unit_of[container])
+            parent[max(a, b)] = min(a, b)
+
+    members = defaultdict(list)
+    for cls in js_defs:
+        members[find(unit_of[cls])].append(cls)
+    size = {u: sum(len(json.dumps(js_defs[cls])) for cls in classes) for u, classes in members.items()}
+    affinity = defaultdict(lambda: defaultdict(float))
+
+    def link(a, b, weight):
+        if a != b:
+            affinity[a][b] += weight
+            affinity[b][a] += weight
+
+    for cls, targets in deps.items():
+        u = find(unit_of[cls])
+        units = sorted({find(unit_of[t]) for t in targets} - {u})
+        for v in units:
+            link(u, v, 1.0)
+        for i, v in enumerate(units):
+            for w in units[i + 1 :]:
+                link(v, w, 1.0 / len(units))
+
+    capacity = max(BALANCE * sum(size.values()) / n, max(size.values(), default=0))
+    while len(members) > n:
+        best = None
+        for a, neighbours in affinity.items():
+            for b, weight in neighbours.items():
+                combined = size[a] + size[b]
+                if a < b and combined <= capacity:
+                    key = (-weight / combined, a, b)
+                    if best is None or key < best:
+                        best = key
+        if best is not None:
+            _, a, b = best
+        else:
+            a, b = sorted(sorted(members, key=lambda u: (size[u], u))[:2])
+        members[a].extend(members.pop(b))
+        size[a] += size.pop(b)
+        for c, weight in affinity.pop(b, {}).items():
+            del affinity[c][b]
+            link(a, c, weight)
+
+    shards = [sorted(classes, key=order.__getitem__) for classes in members.values()]
+    return sorted(shards, key=lambda classes: order[classes[0]])
+
+
+def shard_abs_path(root_proc, name: str) -> str:
+    """Returns the absolute path of a shard document, alongside the split files"""
+    parsed_url = urlparse(root_proc.id)
+    return str(Path(parsed_url.path).parent.joinpath(root_proc.shard_key, name))
+
+
+def build_shards(root_proc, shards: list[list[str]]) -> tuple[list[dict], dict]:
+    """Returns the shard documents for a plan from :func:`plan_shards`, and a manifest
+    mapping each class to the path of its shard. References between classes point
+    into the right shard and references to imported classes to their split files.
+
+    :param root_proc: root YamlSchemaProcessor
+    :param shards: class names of each shard
+    """
+    kw = root_proc.schema_def_keyword
+    js_defs = root_proc.for_js[kw]
+    processors = class_processors(root_proc)
+    paths = [shard_abs_path(root_proc, str(i)) for i in range(len(shards))]
+    location = {cls: i for i, classes in enumerate(shards) for cls in classes}
+    parsed_url = urlparse(root_proc.id)
+
+    def rewrite(node, i):
+        if isinstance(node, dict):
+            for k, v in node.items():
+                if k == "$ref" and isinstance(v, str):
+                    target, proc = resolve_ref(v, processors)
+                    if proc is not root_proc:
+                        node[k] = proc.get_class_abs_path(target, "json")
+                    elif location[target] == i:
+                        node[k] = f"#/{kw}/{target}"
+                    else:
+                        node[k] = f"{paths[location[target]]}#/{kw}/{target}"
+                else:
+                    rewrite(v, i)
+        elif isinstance(node, list):
+            for item in node:
+                rewrite(item, i)
+
+    docs = []
+    for i, classes in enumerate(shards):
+        defs = {cls: copy.deepcopy(js_defs[cls]) for cls in classes}
+        rewrite(defs, i)
+        doc = {k: root_proc.for_js[k] for k in ("$schema",) if k in root_proc.for_js}
+        doc["$id"] = f"{parsed_url.scheme}://{parsed_url.netloc}{paths[i]}"
+        doc[kw] = defs
+        docs.append(doc)
+    manifest = {
+        "$id": root_proc.id,
+        "shards": paths,
+        "classes": {cls: paths[i] for cls, i in location.items()},
+    }
+    return docs, manifest
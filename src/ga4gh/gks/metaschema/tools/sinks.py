@@ -0,0 +1,161 @@
+"""Output sinks for generated artifacts
+
+Writers address files by POSIX paths relative to the sink root (e.g. ``json/Allele``)
+and every sink stores exactly the bytes it is given, so the same build produces
+identical content on disk, in memory or in an archive.
+"""
+
+import gzip
+import io
+import tarfile
+import zipfile
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+# fixed timestamps keep archives and compressed files reproducible
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class OutputSink(ABC):
+    """Destination for generated files"""
+
+    @abstractmethod
+    def write(self, path: str, data: bytes | str) -> None:
+        """Stores ``data`` at ``path``"""
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[TextIO]:
+        """Returns a text stream whose contents are written to ``path`` when closed"""
+        buf = io.StringIO()
+        yield buf
+        self.write(path, buf.getvalue())
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _encode(data: bytes | str) -> bytes:
+    return data.encode() if isinstance(data, str) else data
+
+
+class FileSystemSink(OutputSink):
+    """Writes files below a root directory, creating directories as needed"""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def _target(self, path: str) -> Path:
+        fp = self.root / path
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        return fp
+
+    def write(self, path: str, data: bytes | str) -> None:
+        self._target(path).write_bytes(_encode(data))
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[TextIO]:
+        with open(self._target(path), "w", encoding="utf-8") as f:
+            yield f
+
+
+class MemorySink(OutputSink):
+    """Keeps files in memory, in the ``files`` dict keyed by path"""
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    def write(self, path: str, data: bytes | str) -> None:
+        self.files[path] = _encode(data)
+
+
+class ArchiveSink(OutputSink):
+    """Streams files into a single zip or tar archive. The format is taken from the
+    archive suffix (``.zip``, ``.tar``, ``.tar.gz`` or ``.tgz``) unless given.
+
+    :param fp: archive to create
+    :param fmt: one of "zip", "tar" or "tar.gz"
+    """
+
+    def __init__(self, fp: str | Path, fmt: str | None = None):
+        self.fp = Path(fp)
+        if fmt is None:
+            name = self.fp.name
+            if name.endswith(".zip"):
+                fmt = "zip"
+            elif name.endswith((".tar.gz", ".tgz")):
+                fmt = "tar.gz"
+            elif name.endswith(".tar"):
+                fmt = "tar"
+            else:
+                raise ValueError(f"cannot infer archive format of {fp}")
+        self.fmt = fmt
+        self._gzip = None
+        if fmt == "zip":
+            self._archive = zipfile.ZipFile(self.fp, "w", compression=zipfile.ZIP_DEFLATED)
+        elif fmt == "tar":
+            self._archive = tarfile.open(self.fp, "w")
+        elif fmt == "tar.gz":
+            # "w:gz" would store the current time and file name in the gzip header
+            self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=open(self.fp, "wb"), mtime=0)
+            self._archive = tarfile.open(fileobj=self._gzip, mode="w")
+        else:
+            raise ValueError("fmt must be zip, tar or tar.gz")
+
+    def write(self, path: str, data: bytes | str) -> None:
+        data = _encode(data)
+        if self.fmt == "zip":
+            info = zipfile.ZipInfo(path, date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        self._archive.close()
+        if self._gzip is not None:
+            raw = self._gzip.fileobj
+            self._gzip.close()
+            raw.close()
+
+
+class GzipSiblingSink(OutputSink):
+    """Wraps another sink, also writing a precompressed ``.gz`` sibling of every file
+    for static hosting.
+
+    :param sink: sink receiving both the original and compressed files
+    """
+
+    def __init__(self, sink: OutputSink):
+        self.sink = sink
+
+    def write(self, path: str, data: bytes | str) -> None:
+        data = _encode(data)
+        self.sink.write(path, data)
+        self.sink.write(f"{path}.gz", gzip.compress(data, mtime=0))
+
+    def close(self) -> None:
+        self.sink.close()
+
+
+def open_sink(root: str | Path, archive: str | Path | None = None, precompress: bool = False) -> OutputSink:
+    """Returns the sink selected by the common script options
+
+    :param root: directory for plain files when no archive is given
+    :param archive: archive to write instead of plain files
+    :param precompress: also write ``.gz`` siblings
+    """
+    sink = ArchiveSink(archive) if archive else FileSystemSink(root)
+    return GzipSiblingSink(sink) if precompress else sink
@@ -0,0 +1,76 @@
+"""Immutable, picklable snapshots of processed schemas
+
+A :class:`SchemaSnapshot` holds the definitions, tables, ids and paths of a
+YamlSchemaProcessor (and of its imports) in read-only containers. Snapshots are safe
+to read from several threads, pickle without the processors that built them, and
+support the same queries as processors, so the scripts accept either.
+"""
+
+from ga4gh.gks.metaschema.tools.frozen import FrozenDict, freeze
+from ga4gh.gks.metaschema.tools.schema_queries import CACHED_ATTRIBUTES, SchemaQueries
+
+
+class SchemaSnapshot(SchemaQueries):
+    """Read-only copy of a processed schema. Build with
+    ``YamlSchemaProcessor.snapshot()``.
+    """
+
+    # copied from the processor; containers are frozen
+    ATTRIBUTES = (
+        "schema_fp",
+        "imported",
+        "root_schema_fp",
+        "merged",
+        "id",
+        "yaml_key",
+        "json_key",
+        "defs_key",
+        "bundle_key",
+        "shard_key",
+        "yaml_fp",
+        "json_fp",
+        "def_fp",
+        "namespaces",
+        "schema_def_keyword",
+        "digest",
+        "strict",
+        "enforce_ordered",
+        "raw_schema",
+        "processed_schema",
+        "for_js",
+        "has_children",
+        "has_children_urls",
+        "has_protected_members",
+        "processed_classes",
+    )
+
+    @classmethod
+    def from_processor(cls, proc) -> "SchemaSnapshot":
+        snapshot = cls.__new__(cls)
+        memo = {}
+        state = {attr: freeze(getattr(proc, attr), memo) for attr in cls.ATTRIBUTES}
+        state["raw_defs"] = state["raw_schema"].get(proc.schema_def_keyword)
+        state["defs"] = state["processed_schema"].get(proc.schema_def_keyword)
+        state["imports"] = FrozenDict({name: other.snapshot() for name, other in proc.imports.items()})
+        snapshot.__dict__.update(state)
+        return snapshot
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getstate__(self):
+        # derived caches are rebuilt on first use after unpickling
+        return {k: v for k, v in self.__dict__.items() if k not in CACHED_ATTRIBUTES}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def process_schema_class(self, schema_class):
+        # every class of a snapshot is already processed
+        pass
+
+    def snapshot(self) -> "SchemaSnapshot":
+        return self
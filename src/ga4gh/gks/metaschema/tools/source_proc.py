@@ -2,14 +2,22 @@
 """convert yaml on stdin to json on stdout"""
 
 import copy
-import json
 import re
 from collections import defaultdict
 from pathlib import Path
-from urllib.parse import urlparse
 
 import yaml
 
+from ga4gh.gks.metaschema.tools.profiling import span
+from ga4gh.gks.metaschema.tools.schema_queries import SchemaQueries
+from ga4gh.gks.metaschema.tools.snapshot import SchemaSnapshot
+from ga4gh.gks.metaschema.tools.validation import (
+    SchemaValidationError,
+    ValidationCache,
+    Violation,
+    source_digest,
+)
+
 SCHEMA_DEF_KEYWORD_BY_VERSION = {
     "https://json-schema.org/draft-07/schema": "definitions",
     "https://json-schema.org/draft/2020-12/schema": "$defs",
@@ -21,19 +29,22 @@ link_re = re.compile(r"`(.*?)\s?\<(.*)\>`_")
 curie_re = re.compile(r"(\S+):(\S+)")
 defs_re = re.compile(r"#/(\$defs|definitions)/.*")
 
-maturity_levels = {"deprecated": 0, "draft": 1, "trial use": 2, "normative": 3}
-
 
-class YamlSchemaProcessor:
-    def __init__(self, schema_fp, root_fp=None):
+class YamlSchemaProcessor(SchemaQueries):
+    def __init__(self, schema_fp, root_fp=None, trusted=False, check=True):
         self.schema_fp = Path(schema_fp)
         self.imported = root_fp is not None
         self.root_schema_fp = root_fp
+        self.trusted = trusted
+        self.check = check
+        self.merged = False
         self.raw_schema = self.load_schema(schema_fp)
         self.id = self.raw_schema["$id"]
         self.yaml_key = self.raw_schema.get("yaml-target", "yaml")
         self.json_key = self.raw_schema.get("json-target", "json")
         self.defs_key = self.raw_schema.get("def-target", "def")
+        self.bundle_key = self.raw_schema.get("bundle-target", "bundle")
+        self.shard_key = self.raw_schema.get("shard-target", "shards")
         # schema_root_name = str(self.schema_fp.stem)[:-7]  # removes "-source"
         self.yaml_fp = self.schema_fp.parent / self.yaml_key
         self.json_fp = self.schema_fp.parent / self.json_key
@@ -44,6 +55,9 @@ class YamlSchemaProcessor:
         self.raw_defs = self.raw_schema.get(self.schema_def_keyword, None)
         self.imports = {}
         self.import_dependencies()
+        self.digest = source_digest(
+            self.schema_fp.read_bytes(), {name: other.digest for name, other in self.imports.items()}
+        )
         self.strict = self.raw_schema.get("strict", False)
         self.enforce_ordered = self.raw_schema.get("enforce_ordered", self.strict)
         self._init_from_raw()
@@ -56,11 +70,17 @@ class YamlSchemaProcessor:
         self.processed_schema = copy.deepcopy(self.raw_schema)
         self.defs = self.processed_schema.get(self.schema_def_keyword, None)
         self.processed_classes = set()
+        self._discard_cached()
         self.process_schema()
         self.check_processed_schema()
         self.for_js = copy.deepcopy(self.processed_schema)
         self.clean_for_js()
 
+    def snapshot(self):
+        """Returns an immutable, picklable copy of the processed schema and its imports"""
+        with span("snapshot", source=str(self.schema_fp)):
+            return SchemaSnapshot.from_processor(self)
+
     def build_inheritance_dicts(self):
         # For all classes:
         #   If an abstract class, register oneOf/anyOf enumerations
@@ -102,14 +122,11 @@ class YamlSchemaProcessor:
                 self.has_children_urls[target_url] = maps_to_urls
                 self.has_children[target] = maps_to
 
-    def get_all_descendants(self, cls):
-        out = set()
-        for descendant in self.has_children.get(cls, []):
-            out.add(descendant)
-            out.update(self.get_all_descendants(descendant))
-        return out
-
     def merge_imported(self):
+        with span("merge_imported", source=str(self.schema_fp)):
+            self._merge_imported()
+
+    def _merge_imported(self):
         # register all import namespaces and create process order
         # note: relying on max_recursion_depth errors and not checking for cyclic imports
         self.import_locations = {}
@@ -149,6 +166,7 @@ class YamlSchemaProcessor:
 
         # update title
         self.raw_schema["title"] = self.raw_schema["title"] + "-Merged-Imports"
+        self.merged = True
 
         # reprocess raw_schema
         self.raw_defs = self.raw_schema.get(self.schema_def_keyword, None)
@@ -187,11 +205,15 @@ class YamlSchemaProcessor:
 
     @staticmethod
     def load_schema(schema_fp):
-        with open(schema_fp) as f:
+        with span("load_yaml", source=str(schema_fp)), open(schema_fp) as f:
             schema = yaml.load(f, Loader=yaml.SafeLoader)
         return schema
 
     def import_dependencies(self):
+        with span("import_dependencies", source=str(self.schema_fp)):
+            self._import_dependencies()
+
+    def _import_dependencies(self):
         for dependency in self.raw_schema.get("imports", []):
             fp = Path(self.raw_schema["imports"][dependency])
             if not fp.is_absolute():
@@ -201,83 +223,29 @@ class YamlSchemaProcessor:
                 root_fp = self.root_schema_fp
             else:
                 root_fp = self.schema_fp
-            self.imports[dependency] = YamlSchemaProcessor(fp, root_fp=root_fp)
+            self.imports[dependency] = YamlSchemaProcessor(fp, root_fp=root_fp, trusted=self.trusted, check=self.check)
 
     def process_schema(self):
         if self.defs is None:
             return
 
-        for schema_class in self.defs:
-            self.process_schema_class(schema_class)
+        with span("process_schema", source=str(self.schema_fp)):
+            for schema_class in self.defs:
+                self.process_schema_class(schema_class)
 
     def check_processed_schema(self):
-        for cls in self.processed_classes:
-            cls_def = self.defs[cls]
-            if "inherits" in cls_def:
-                inherited_cls_name = cls_def["inherits"]
-                if ":" in inherited_cls_name:
-                    namespace, inherited_cls_split_name = inherited_cls_name.split(":")
-                    inherited_cls_def = self.imports[namespace].defs[inherited_cls_split_name]
-                else:
-                    inherited_cls_def = self.defs[inherited_cls_name]
-                assert "maturity" in cls_def, cls
-                assert "maturity" in inherited_cls_def, inherited_cls_name
-                assert (
-                    inherited_cls_def["maturity"] >= cls_def["maturity"]
-                ), f"Maturity of {cls} is greater than parent class {inherited_cls_name}."
-            pass
-
-    def class_is_abstract(self, schema_class):
-        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
-        return "properties" not in schema_class_def and not self.class_is_primitive(schema_class)
-
-    def class_is_container(self, schema_class):
-        cls_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
-        return self.class_is_abstract(schema_class) and ("oneOf" in cls_def or "anyOf" in cls_def or "allOf" in cls_def)
-
-    def class_is_protected(self, schema_class):
-        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
-        return "protectedClassOf" in schema_class_def
-
-    def class_is_ga4gh_identifiable(self, schema_class):
-        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
-        return "ga4gh" in schema_class_def and "prefix" in schema_class_def["ga4gh"]
-
-    def class_is_passthrough(self, schema_class):
-        if not self.class_is_abstract(schema_class):
-            return False
-        raw_class_definition, _ = self.get_local_or_inherited_class(schema_class, raw=True)
-        if (
-            "heritableProperties" not in raw_class_definition
-            and "properties" not in raw_class_definition
-            and raw_class_definition.get("inherits", False)
-        ):
-            return True
-        return False
-
-    def class_is_primitive(self, schema_class):
-        schema_class_def, _ = self.get_local_or_inherited_class(schema_class, raw=True)
-        schema_class_type = schema_class_def.get("type", "abstract")
-        if schema_class_type not in ["abstract", "object"]:
-            return True
-        return False
-
-    def class_is_subclass(self, schema_class, parent_class):
-        schema_class_fragment = f"#/{self.schema_def_keyword}/{schema_class}"
-        parent_class_fragment = f"#/{self.schema_def_keyword}/{parent_class}"
-        children = self.concretize_class_ref(parent_class_fragment)
-        return schema_class_fragment in children
-
-    def js_json_dump(self, stream):
-        json.dump(self.for_js, stream, indent=3, sort_keys=False)
-
-    def js_yaml_dump(self, stream):
-        yaml.dump(self.for_js, stream, sort_keys=False)
-
-    def resolve_curie(self, curie):
-        namespace, identifier = curie.split(":")
-        base_url = self.namespaces[namespace]
-        return base_url + identifier
+        if not self.check:
+            return
+        key = f"{self.digest}-merged" if self.merged else self.digest
+        cache = ValidationCache() if self.trusted and self.digest is not None else None
+        if cache is not None and key in cache:
+            return
+        with span("validate", source=str(self.schema_fp)):
+            violations = self.validate()
+        if violations:
+            raise SchemaValidationError(self.schema_fp, violations)
+        if cache is not None:
+            cache.add(key)
 
     def process_property_tree_refs(self, raw_node, processed_node):
         if isinstance(raw_node, dict):
@@ -298,65 +266,18 @@ class YamlSchemaProcessor:
                 self.process_property_tree_refs(raw_item, processed_item)
         return
 
-    def get_local_or_inherited_class(self, schema_class, raw=False):
-        components = schema_class.split(":")
-        if len(components) == 1:
-            inherited_class_name = components[0]
-            if raw:
-                inherited_class = self.raw_schema[self.schema_def_keyword][inherited_class_name]
-            else:
-                self.process_schema_class(inherited_class_name)
-                inherited_class = self.processed_schema[self.schema_def_keyword][inherited_class_name]
-            proc = self
-        elif len(components) == 2:
-            inherited_class_name = components[1]
-            proc = self.imports[components[0]]
-            if raw:
-                inherited_class = proc.raw_schema[proc.schema_def_keyword][inherited_class_name]
-            else:
-                inherited_class = proc.processed_schema[proc.schema_def_keyword][inherited_class_name]
-        else:
-            raise ValueError
-        return inherited_class, proc
-
-    def get_class_uri(self, schema_class, mode):
-        abs_path = self.get_class_abs_path(schema_class, mode)
-        parsed_url = urlparse(self.id)
-        return f"{parsed_url.scheme}://{parsed_url.netloc}{abs_path}"
-
-    def get_class_abs_path(self, schema_class, mode):
-        if mode == "json":
-            export_key = self.json_key
-        elif mode == "yaml":
-            export_key = self.yaml_key
-        else:
-            raise ValueError("mode must be json or yaml")
-        if self.class_is_protected(schema_class):
-            frag_containing_class = self.raw_defs[schema_class]["protectedClassOf"]
-            class_ref = f"{frag_containing_class}#/{self.schema_def_keyword}/{schema_class}"
-        else:
-            class_ref = schema_class
-        parsed_url = urlparse(self.id)
-        parsed_id_path = parsed_url.path
-        revised_path = Path(parsed_id_path).parent.joinpath(export_key, class_ref)
-        return str(revised_path)
-
     def process_schema_class(self, schema_class):
-        raw_class_def = self.raw_schema[self.schema_def_keyword][schema_class]
         if schema_class in self.processed_classes:
             return
-        processed_class_def = self.processed_schema[self.schema_def_keyword][schema_class]
+        with span("process_schema_class", schema_class=schema_class):
+            self._process_schema_class(schema_class)
 
-        # Check GKS maturity model on all schemas
-        assert "maturity" in processed_class_def, schema_class
-        assert processed_class_def["maturity"] in maturity_levels, schema_class
+    def _process_schema_class(self, schema_class):
+        raw_class_def = self.raw_schema[self.schema_def_keyword][schema_class]
+        processed_class_def = self.processed_schema[self.schema_def_keyword][schema_class]
 
         if self.class_is_protected(schema_class):
-            containing_class = self.raw_defs[schema_class]["protectedClassOf"]
-            self.has_protected_members[containing_class].add(schema_class)
-            if containing_class in self.has_children:
-                for descendant in self.get_all_descendants(containing_class):
-                    self.has_protected_members[descendant].add(schema_class)
+            self._register_protected_class(schema_class)
 
         if self.class_is_primitive(schema_class):
             self.processed_classes.add(schema_class)
@@ -374,7 +295,6 @@ class YamlSchemaProcessor:
             # inherit ga4gh keys
             if "ga4gh" in processed_class_def or "ga4gh" in inherited_class:
                 if "ga4gh" not in processed_class_def:
-                    assert self.class_is_abstract(schema_class), f"{schema_class} is missing a defined prefix."
                     processed_class_def["ga4gh"] = copy.deepcopy(inherited_class["ga4gh"])
                 elif "ga4gh" not in inherited_class:
                     pass
@@ -406,9 +326,11 @@ class YamlSchemaProcessor:
         for prop, prop_attribs in processed_class_properties.items():
             # Mix in inherited properties
             if "extends" in prop_attribs:
-                # assert that the extended property is in inherited properties
-                assert prop_attribs["extends"] in inherited_properties
                 extended_property = prop_attribs["extends"]
+                if extended_property not in inherited_properties:
+                    # processing cannot continue, so this is reported on its own
+                    message = f"{prop} extends {extended_property}, which is not an inherited property"
+                    raise SchemaValidationError(self.schema_fp, [Violation(schema_class, "extends", message)])
                 # fix $ref and oneOf $ref inheritance
                 if "$ref" in prop_attribs:
                     if "oneOf" in inherited_properties[extended_property]:
@@ -427,32 +349,6 @@ class YamlSchemaProcessor:
                 if extended_property in inherited_required:
                     inherited_required.remove(extended_property)
                     processed_class_required.add(prop)
-            # Validate required array attribute for GKS specs
-            if self.enforce_ordered and prop_attribs.get("type", "") == "array":
-                assert "ordered" in prop_attribs, f"{schema_class}.{prop} missing ordered attribute."
-                assert isinstance(prop_attribs["ordered"], bool)
-            if self.strict and prop_attribs.get("type", "") == "object":
-                assert (
-                    prop_attribs.get("additionalProperties", None) is not None
-                ), f'"additionalProperties" expected to be defined in {schema_class}.{prop}'
-
-        # Validate class structures for GKS specs
-        if self.class_is_abstract(schema_class):
-            assert "type" not in processed_class_def, schema_class
-        else:
-            assert "type" in processed_class_def, schema_class
-            assert processed_class_def["type"] == "object", schema_class
-            if self.class_is_ga4gh_identifiable(schema_class):
-                assert isinstance(processed_class_def["ga4gh"]["prefix"], str), schema_class
-                assert processed_class_def["ga4gh"]["prefix"] != "", schema_class
-                l = len(processed_class_def["ga4gh"]["inherent"])  # noqa: E741
-                assert (
-                    l >= 2
-                ), f"GA4GH identifiable objects are expected to be defined by at least 2 properties, {schema_class} has {l}."  # noqa: E501
-                assert (
-                    "type" in processed_class_def["ga4gh"]["inherent"]
-                ), f"GA4GH identifiable objects are expected to include the class type but not included for {schema_class}."  # noqa: E501
-                # Two properites should be `type` and at least one other field
 
         processed_class_def[prop_k] = inherited_properties | processed_class_properties
         processed_class_def[req_k] = sorted(inherited_required | processed_class_required)
@@ -460,6 +356,122 @@ class YamlSchemaProcessor:
             processed_class_def["additionalProperties"] = False
         self.processed_classes.add(schema_class)
 
+    def _register_protected_class(self, schema_class):
+        containing_class = self.raw_defs[schema_class]["protectedClassOf"]
+        self.has_protected_members[containing_class].add(schema_class)
+        if containing_class in self.has_children:
+            for descendant in self.get_all_descendants(containing_class):
+                self.has_protected_members[descendant].add(schema_class)
+
+    def update_class(self, schema_class, raw_class_def):
+        """
+        Replaces (or adds) the source definition of a class and reprocesses only the
+        classes affected: the class itself, its descendants, classes whose concretized
+        references change and classes whose protected members change. If the update
+        violates GKS rules, the previous definition is restored and
+        SchemaValidationError is raised; it is also restored if reprocessing fails,
+        e.g. on an unknown parent, and the error re-raised. Updates that would make
+        the class inherit from itself raise ValueError without changing anything.
+
+        :param schema_class: name of the class
+        :param raw_class_def: source definition of the class
+        :return: names of classes whose processed or JSON Schema definitions, or
+            protected members, changed
+        """
+        if self.defs is None:
+            raise ValueError(f"{self.schema_fp} defines no {self.schema_def_keyword} to update")
+        # a cycle cannot be rolled back once registered, so it is rejected up front
+        parent, seen = raw_class_def.get("inherits"), [schema_class]
+        while parent is not None and ":" not in parent and parent not in seen:
+            seen.append(parent)
+            parent = self.raw_defs.get(parent, {}).get("inherits")
+        if parent in seen:
+            raise ValueError(f"{schema_class} would inherit from itself: {' -> '.join([*seen, parent])}")
+        with span("update_class", schema_class=schema_class):
+            return self._update_class(schema_class, raw_class_def, check=self.check)
+
+    def _update_class(self, schema_class, raw_class_def, check):
+        # raw_class_def None removes the class, used to roll back additions
+        previous = self.raw_defs.get(schema_class)
+        previous_digest = self.digest
+        try:
+            changed, reprocessed = self._reprocess_class(schema_class, raw_class_def)
+            violations = self.validate([cls for cls in reprocessed if cls in self.defs]) if check else []
+        except Exception:
+            self._update_class(schema_class, previous, check=False)
+            self.digest = previous_digest
+            raise
+        if violations:
+            self._update_class(schema_class, previous, check=False)
+            self.digest = previous_digest
+            raise SchemaValidationError(self.schema_fp, violations)
+        # the source document no longer matches the validation cache
+        self.digest = None
+        return changed
+
+    def _reprocess_class(self, schema_class, raw_class_def):
+        # returns the changed classes and the classes reprocessed
+        defs = self.defs
+        js_defs = self.for_js[self.schema_def_keyword]
+        index = self.index  # references as they were before the update
+        old_descendants = self.get_all_descendants(schema_class)
+        old_concrete = {url: self.concretize_class_ref(url) for url in self.has_children_urls}
+        old_protected = {cls: set(members) for cls, members in self.has_protected_members.items()}
+
+        if raw_class_def is None:
+            del self.raw_defs[schema_class]
+        else:
+            self.raw_defs[schema_class] = raw_class_def
+        self.has_children_urls = {}
+        self.has_children = {}
+        self.build_inheritance_dicts()
+
+        # reprocess the class and everything inheriting from it
+        reprocess = {schema_class} | old_descendants | self.get_all_descendants(schema_class)
+        reprocess = [cls for cls in self.raw_defs if cls in reprocess]
+        old_defs = {cls: defs.get(cls) for cls in reprocess}
+        if raw_class_def is None:
+            old_defs[schema_class] = defs.pop(schema_class, None)
+            self.processed_classes.discard(schema_class)
+        for cls in reprocess:
+            defs[cls] = copy.deepcopy(self.raw_defs[cls])
+            self.processed_classes.discard(cls)
+        self.has_protected_members = defaultdict(set)
+        for cls in defs:
+            if self.class_is_protected(cls):
+                self._register_protected_class(cls)
+        for cls in reprocess:
+            self.process_schema_class(cls)
+
+        # regenerate JSON Schema for reprocessed classes and for referrers of classes
+        # whose concretization changed
+        concretized = {schema_class} | set(reprocess)
+        for url in old_concrete.keys() | self.has_children_urls.keys():
+            if old_concrete.get(url, {url}) != self.concretize_class_ref(url):
+                concretized.update(edge.source for edge in index.referrers(url.split("/")[-1]))
+        old_js = {cls: js_defs.get(cls) for cls in concretized}
+        for cls in concretized:
+            js_def = copy.deepcopy(defs[cls]) if cls in defs else None
+            if js_def is not None and self._clean_class_for_js(cls, js_def):
+                js_defs[cls] = js_def
+            else:
+                js_defs.pop(cls, None)
+        order = [cls for cls in defs if cls in js_defs]
+        if list(js_defs) != order:
+            items = [(cls, js_defs[cls]) for cls in order]
+            js_defs.clear()
+            js_defs.update(items)
+
+        changed = {cls for cls, old_def in old_defs.items() if old_def != defs.get(cls)}
+        changed |= {cls for cls, old_def in old_js.items() if old_def != js_defs.get(cls)}
+        for cls in old_protected.keys() | self.has_protected_members.keys():
+            members = self.has_protected_members.get(cls, set())
+            if members != old_protected.get(cls, set()) or members & changed:
+                changed.add(cls)
+
+        index.refresh(self, old_defs)
+        return changed, reprocess
+
     @staticmethod
     def _scrub_rst_markup(string):
         string = ref_re.sub(r"\g<1>", string)
@@ -468,37 +480,48 @@ class YamlSchemaProcessor:
         return string
 
     def clean_for_js(self):
+        with span("clean_for_js", source=str(self.schema_fp)):
+            self._clean_for_js()
+
+    def _clean_for_js(self):
         self.for_js.pop("namespaces", None)
         self.for_js.pop("strict", None)
         self.for_js.pop("enforce_ordered", None)
         self.for_js.pop("imports", None)
         abstract_class_removals = []
         for schema_class, schema_definition in self.for_js.get(self.schema_def_keyword, {}).items():
-            schema_definition.pop("inherits", None)
-            schema_definition.pop("protectedClassOf", None)
-            if self.class_is_abstract(schema_class):
-                schema_definition.pop("heritableProperties", None)
-                schema_definition.pop("heritableRequired", None)
-                schema_definition.pop("ga4gh", None)
-                schema_definition.pop("header_level", None)
-                self.concretize_js_object(schema_definition)
-                if (
-                    "oneOf" not in schema_definition
-                    and "allOf" not in schema_definition
-                    and "$ref" not in schema_definition
-                ):
-                    abstract_class_removals.append(schema_class)
-            if "description" in schema_definition:
-                schema_definition["description"] = self._scrub_rst_markup(schema_definition["description"])
-            if "properties" in schema_definition:
-                for p, p_def in schema_definition["properties"].items():
-                    if "description" in p_def:
-                        p_def["description"] = self._scrub_rst_markup(p_def["description"])
-                    self.concretize_js_object(p_def)
+            if not self._clean_class_for_js(schema_class, schema_definition):
+                abstract_class_removals.append(schema_class)
 
         for cls in abstract_class_removals:
             self.for_js[self.schema_def_keyword].pop(cls)
 
+    def _clean_class_for_js(self, schema_class, schema_definition):
+        # returns False for abstract classes that are left out of JSON Schema
+        schema_definition.pop("inherits", None)
+        schema_definition.pop("protectedClassOf", None)
+        keep = True
+        if self.class_is_abstract(schema_class):
+            schema_definition.pop("heritableProperties", None)
+            schema_definition.pop("heritableRequired", None)
+            schema_definition.pop("ga4gh", None)
+            schema_definition.pop("header_level", None)
+            self.concretize_js_object(schema_definition)
+            if (
+                "oneOf" not in schema_definition
+                and "allOf" not in schema_definition
+                and "$ref" not in schema_definition
+            ):
+                keep = False
+        if "description" in schema_definition:
+            schema_definition["description"] = self._scrub_rst_markup(schema_definition["description"])
+        if "properties" in schema_definition:
+            for p, p_def in schema_definition["properties"].items():
+                if "description" in p_def:
+                    p_def["description"] = self._scrub_rst_markup(p_def["description"])
+                self.concretize_js_object(p_def)
+        return keep
+
     def concretize_js_object(self, js_obj):
         if "$ref" in js_obj:
             descendents = self.concretize_class_ref(js_obj["$ref"])
@@ -519,15 +542,6 @@ class YamlSchemaProcessor:
         elif js_obj.get("type", "") == "array":
             self.concretize_js_object(js_obj["items"])
 
-    def concretize_class_ref(self, cls_url):
-        children = self.has_children_urls.get(cls_url, None)
-        if children is None:
-            return {cls_url}
-        out = set()
-        for child in children:
-            out.update(self.concretize_class_ref(child))
-        return out
-
     @staticmethod
     def _build_ref_list(cls_urls):
         return [{"$ref": url} for url in sorted(cls_urls)]
@@ -0,0 +1,336 @@
+"""Random instances of the classes of a processed schema, for load testing
+
+Instances are generated from the JSON Schema definitions of a schema and its imports,
+so they follow the same required properties, ``oneOf`` concretizations, array, string
+and numeric bounds, enums, constants and patterns that validation checks. Each instance is drawn from its
+own random generator, seeded from the seed, class and index, so any range of
+instances can be generated independently, in any process, with the same result.
+"""
+
+import math
+import operator
+import random
+import string
+from collections.abc import Iterator
+
+from ga4gh.gks.metaschema.tools.refs import class_processors, resolve_ref
+
+# the regular expression parser has no public API: it is only importable from these
+# private modules, and the deprecated top-level aliases may go away
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_constants
+    import sre_parse
+
+# chance of including each optional property, and nesting depth after which optional
+# properties are left out and arrays kept at their minimum length
+OPTIONAL_RATE = 0.5
+MAX_DEPTH = 6
+
+# longest run for unbounded repeats in patterns, and longest unbounded array
+MAX_REPEAT = 8
+MAX_ITEMS = 3
+
+# samples drawn before giving up on a pattern within length bounds, or on unique items
+MAX_ATTEMPTS = 100
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: string.digits,
+    sre_constants.CATEGORY_NOT_DIGIT: string.ascii_letters,
+    sre_constants.CATEGORY_SPACE: " ",
+    sre_constants.CATEGORY_NOT_SPACE: string.ascii_letters + string.digits,
+    sre_constants.CATEGORY_WORD: string.ascii_letters + string.digits + "_",
+    sre_constants.CATEGORY_NOT_WORD: "-. ",
+}
+_PRINTABLE = string.ascii_letters + string.digits + "-_."
+
+
+class PatternSampler:
+    """Generates strings matching a regular expression. The pattern is compiled once
+    into literals, character sets, repeats and alternatives.
+
+    :param pattern: regular expression, as in the ``pattern`` keyword
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._nodes = self._compile(sre_parse.parse(pattern))
+
+    def sample(self, rng: random.Random) -> str:
+        out = []
+        self._emit(self._nodes, rng, out)
+        return "".join(out)
+
+    def _chars(self, items) -> str:
+        chars = []
+        negate = False
+        for op, av in items:
+            if op is sre_constants.NEGATE:
+                negate = True
+            elif op is sre_constants.LITERAL:
+                chars.append(chr(av))
+            elif op is sre_constants.RANGE:
+                chars.extend(chr(c) for c in range(av[0], av[1] + 1))
+            elif op is sre_constants.CATEGORY:
+                chars.extend(_CATEGORIES[av])
+            else:
+                raise ValueError(f"unsupported character set in pattern {self.pattern!r}")
+        if negate:
+            return "".join(c for c in _PRINTABLE if c not in chars)
+        return "".join(dict.fromkeys(chars))
+
+    def _compile(self, parsed) -> list[tuple]:
+        nodes = []
+        for op, av in parsed:
+            if op is sre_constants.LITERAL:
+                nodes.append(("literal", chr(av)))
+            elif op is sre_constants.NOT_LITERAL:
+                nodes.append(("set", "".join(c for c in _PRINTABLE if c != chr(av))))
+            elif op is sre_constants.ANY:
+                nodes.append(("set", _PRINTABLE))
+            elif op is sre_constants.IN:
+                nodes.append(("set", self._chars(av)))
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT):
+                low, high, sub = av
+                high = low + MAX_REPEAT if high is sre_constants.MAXREPEAT else high
+                nodes.append(("repeat", low, high, self._compile(sub)))
+            elif op is sre_constants.SUBPATTERN:
+                nodes.extend(self._compile(av[-1]))
+            elif op is sre_constants.ATOMIC_GROUP:
+                nodes.extend(self._compile(av))
+            elif op is sre_constants.BRANCH:
+                nodes.append(("branch", [self._compile(branch) for branch in av[1]]))
+            elif op is not sre_constants.AT:
+                # anchors match without consuming input; anything else is unsupported
+                raise ValueError(f"unsupported construct {op} in pattern {self.pattern!r}")
+        return nodes
+
+    def _emit(self, nodes: list[tuple], rng: random.Random, out: list[str]) -> None:
+        for node in nodes:
+            kind = node[0]
+            if kind == "literal":
+                out.append(node[1])
+            elif kind == "set":
+                out.append(rng.choice(node[1]))
+            elif kind == "repeat":
+                _, low, high, sub = node
+                count = rng.randint(low, high)
+                if len(sub) == 1 and sub[0][0] == "set":
+                    out.extend(rng.choices(sub[0][1], k=count))
+                else:
+                    for _ in range(count):
+                        self._emit(sub, rng, out)
+            else:
+                self._emit(rng.choice(node[1]), rng, out)
+
+
+class InstanceGenerator:
+    """Generates instances of the classes of a processed schema and its imports
+
+    :param root_proc: processed YamlSchemaProcessor, or a snapshot of one
+    :param seed: seed of every instance generated
+    :param optional_rate: chance of including each optional property
+    """
+
+    def __init__(self, root_proc, seed: int = 0, optional_rate: float = OPTIONAL_RATE):
+        self.root_proc = root_proc
+        self.seed = seed
+        self.optional_rate = optional_rate
+        self._procs = class_processors(root_proc)
+        self._patterns: dict[str, PatternSampler] = {}
+
+    def classes(self) -> list[str]:
+        """Returns the classes of the root schema that have documents of their own"""
+        root_proc = self.root_proc
+        js_defs = root_proc.for_js.get(root_proc.schema_def_keyword) or {}
+        return [cls for cls in js_defs if not root_proc.class_is_protected(cls)]
+
+    def _definition(self, cls: str) -> dict:
+        proc = self._procs[cls]
+        return proc.for_js[proc.schema_def_keyword][cls]
+
+    def _resolve(self, schema: dict) -> dict:
+        while "$ref" in schema:
+            target, _ = resolve_ref(schema["$ref"], self._procs)
+            rest = {k: v for k, v in schema.items() if k != "$ref"}
+            schema = self._merge([self._definition(target), rest]) if rest else self._definition(target)
+        return schema
+
+    def _flatten(self, schemas: list[dict]) -> Iterator[dict]:
+        for schema in schemas:
+            schema = self._resolve(schema)
+            yield schema
+            yield from self._flatten(schema.get("allOf", []))
+
+    def _merge(self, schemas: list[dict]) -> dict:
+        # combines the object subschemas of an allOf into a new schema
+        merged = {}
+        for schema in self._flatten(schemas):
+            for k, v in schema.items():
+                if k == "allOf":
+                    continue
+                elif k == "properties":
+                    props = merged.setdefault("properties", {})
+                    for prop, prop_schema in v.items():
+                        props[prop] = {"allOf": [props[prop], prop_schema]} if prop in props else prop_schema
+                elif k == "required":
+                    merged["required"] = list(dict.fromkeys(merged.get("required", []) + list(v)))
+                elif k == "additionalProperties":
+                    merged[k] = merged.get(k, True) and v
+                else:
+                    merged.setdefault(k, v)
+        return merged
+
+    def rng(self, cls: str, index: int) -> random.Random:
+        """Returns the random generator of an instance"""
+        return random.Random(f"{self.seed}:{cls}:{index}")
+
+    def instance(self, cls: str, index: int):
+        """Returns an instance of a class, the same for the same seed, class and index
+
+        :param cls: name of the class
+        :param index: index of the instance
+        """
+        return self.generate(self._definition(cls), self.rng(cls, index), hint=cls)
+
+    def instances(self, cls: str, start: int, stop: int) -> Iterator:
+        """Iterates over the instances of a class from index ``start`` up to ``stop``"""
+        for index in range(start, stop):
+            yield self.instance(cls, index)
+
+    def generate(self, schema: dict, rng: random.Random, depth: int = 0, hint: str = "value"):
+        """Returns a random value valid against a subschema
+
+        :param schema: JSON Schema of the value
+        :param rng: random generator
+        :param depth: nesting depth of the value
+        :param hint: name of the property, used in generated strings
+        """
+        if depth > 4 * MAX_DEPTH:
+            raise ValueError(f"could not generate {hint}: schema nests too deeply")
+        schema = self._resolve(schema)
+        if "allOf" in schema:
+            return self.generate(self._merge([schema]), rng, depth, hint)
+        if "const" in schema:
+            return schema["const"]
+        if "enum" in schema:
+            return rng.choice(schema["enum"])
+        for applicator in ("oneOf", "anyOf"):
+            if applicator in schema:
+                branch = self._merge(
+                    [{k: v for k, v in schema.items() if k != applicator}, rng.choice(schema[applicator])]
+                )
+                return self.generate(branch, rng, depth, hint)
+        value_type = schema.get("type")
+        if isinstance(value_type, list):
+            value_type = rng.choice(value_type)
+        if value_type is None:
+            value_type = "object" if "properties" in schema else "array" if "items" in schema else "string"
+        if value_type == "object":
+            return self._object(schema, rng, depth)
+        if value_type == "array":
+            return self._array(schema, rng, depth, hint)
+        if value_type == "string":
+            return self._string(schema, rng, hint)
+        if value_type == "integer":
+            return self._integer(schema, rng, hint)
+        if value_type == "number":
+            return self._number(schema, rng, hint)
+        if value_type == "boolean":
+            return rng.random() < 0.5
+        if value_type == "null":
+            return None
+        raise ValueError(f"could not generate {hint}: unsupported type {value_type}")
+
+    def _object(self, schema: dict, rng: random.Random, depth: int) -> dict:
+        required = schema.get("required", [])
+        out = {}
+        for prop, prop_schema in (schema.get("properties") or {}).items():
+            if prop in required or (depth < MAX_DEPTH and rng.random() < self.optional_rate):
+                out[prop] = self.generate(prop_schema, rng, depth + 1, prop)
+        return out
+
+    def _array(self, schema: dict, rng: random.Random, depth: int, hint: str) -> list:
+        low = schema.get("minItems", 0)
+        high = schema.get("maxItems", max(low, MAX_ITEMS))
+        count = low if depth >= MAX_DEPTH else rng.randint(low, high)
+        items = schema.get("items", {})
+        if not schema.get("uniqueItems"):
+            return [self.generate(items, rng, depth + 1, hint) for _ in range(count)]
+        out = []
+        for _ in range(count + MAX_ATTEMPTS):
+            if len(out) == count:
+                break
+            value = self.generate(items, rng, depth + 1, hint)
+            if value not in out:
+                out.append(value)
+        if len(out) < low:
+            raise ValueError(f"could not generate {hint}: too few distinct items for minItems {low}")
+        return out
+
+    @staticmethod
+    def _bounds(schema: dict) -> tuple:
+        # the lower and upper bounds, each a value (None if unbounded) and whether it
+        # is exclusive; the stricter of the inclusive and exclusive keywords applies
+        bounds = []
+        for inclusive, exclusive, stricter in (
+            ("minimum", "exclusiveMinimum", operator.ge),
+            ("maximum", "exclusiveMaximum", operator.le),
+        ):
+            value, limit = schema.get(inclusive), schema.get(exclusive)
+            if isinstance(limit, bool):
+                # draft 4 marks the inclusive bound as exclusive
+                bounds.append((value, limit and value is not None))
+            elif limit is not None and (value is None or stricter(limit, value)):
+                bounds.append((limit, True))
+            else:
+                bounds.append((value, False))
+        return tuple(bounds)
+
+    def _integer(self, schema: dict, rng: random.Random, hint: str) -> int:
+        (low, low_exclusive), (high, high_exclusive) = self._bounds(schema)
+        if low is not None:
+            low = math.floor(low) + 1 if low_exclusive else math.ceil(low)
+        if high is not None:
+            high = math.ceil(high) - 1 if high_exclusive else math.floor(high)
+        low = low if low is not None else min(0, high - 1000) if high is not None else 0
+        high = high if high is not None else low + 1000
+        if low > high:
+            raise ValueError(f"could not generate {hint}: no integer within bounds")
+        return rng.randint(low, high)
+
+    def _number(self, schema: dict, rng: random.Random, hint: str) -> float:
+        (low, low_exclusive), (high, high_exclusive) = self._bounds(schema)
+        low = low if low is not None else min(0, high - 1) if high is not None else 0
+        high = high if high is not None else low + 1
+        if low > high or (low == high and (low_exclusive or high_exclusive)):
+            raise ValueError(f"could not generate {hint}: no number within bounds")
+        value = round(rng.uniform(low, high), 6)
+        if (low_exclusive and value <= low) or (high_exclusive and value >= high):
+            # rounding reached an exclusive bound
+            value = (low + high) / 2
+        return value
+
+    def _string(self, schema: dict, rng: random.Random, hint: str) -> str:
+        low = schema.get("minLength", 0)
+        high = schema.get("maxLength")
+        pattern = schema.get("pattern")
+        if pattern is not None:
+            sampler = self._patterns.get(pattern)
+            if sampler is None:
+                sampler = self._patterns[pattern] = PatternSampler(pattern)
+            for _ in range(MAX_ATTEMPTS):
+                value = sampler.sample(rng)
+                if low <= len(value) and (high is None or len(value) <= high):
+                    return value
+            raise ValueError(f"could not generate {hint}: no match of {pattern!r} within length bounds")
+        token = "".join(rng.choices(string.ascii_lowercase + string.digits, k=8))
+        if schema.get("format") in ("iri", "iri-reference", "uri", "uri-reference"):
+            value = f"https://example.org/{hint}/{token}"
+        else:
+            value = f"{hint}:{token}"
+        if len(value) < low:
+            value += "".join(rng.choices(string.ascii_lowercase + string.digits, k=low - len(value)))
+        return value if high is None else value[:high]
@@ -0,0 +1,221 @@
+"""GKS metaschema rule checks, run as a single pass over a processed schema"""
+
+import hashlib
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+maturity_levels = {"deprecated": 0, "draft": 1, "trial use": 2, "normative": 3}
+
+# Bump whenever a rule is added or changed so that cached results are invalidated
+RULESET_VERSION = 2
+
+
+class Violation(NamedTuple):
+    """A single GKS rule violation found in a schema class"""
+
+    schema_class: str
+    rule: str
+    message: str
+
+    def __str__(self):
+        return f"{self.schema_class}: {self.message} [{self.rule}]"
+
+
+class SchemaValidationError(ValueError):
+    """Raised when a processed schema violates one or more GKS rules"""
+
+    def __init__(self, source: str | Path, violations: Iterable[Violation]):
+        self.source = source
+        self.violations = list(violations)
+        details = "\n".join(f"  {v}" for v in self.violations)
+        super().__init__(f"{source} has {len(self.violations)} GKS rule violation(s):\n{details}")
+
+
+_rules: list[tuple[str, Callable]] = []
+
+
+def rule(name: str) -> Callable:
+    """Registers a rule check. Checks are called as ``check(proc, schema_class)`` and
+    yield a message for each violation found.
+
+    :param name: rule name reported alongside each violation
+    """
+
+    def register(check: Callable) -> Callable:
+        _rules.append((name, check))
+        return check
+
+    return register
+
+
+def _own_properties(proc, schema_class: str) -> dict:
+    # processed definitions of the properties declared by the class itself, after any
+    # attributes inherited through ``extends`` are merged in
+    prop_k = "heritableProperties" if proc.class_is_abstract(schema_class) else "properties"
+    own = proc.raw_defs[schema_class].get(prop_k) or {}
+    processed = proc.defs[schema_class].get(prop_k) or {}
+    return {prop: processed[prop] for prop in own if prop in processed}
+
+
+@rule("maturity")
+def check_maturity(proc, schema_class: str) -> Iterator[str]:
+    cls_def = proc.defs[schema_class]
+    if "maturity" not in cls_def:
+        yield "missing maturity attribute."
+    elif cls_def["maturity"] not in maturity_levels:
+        yield f"unknown maturity level {cls_def['maturity']!r}."
+
+
+@rule("maturity-parent")
+def check_maturity_parent(proc, schema_class: str) -> Iterator[str]:
+    cls_def = proc.defs[schema_class]
+    if "inherits" not in cls_def or cls_def.get("maturity") not in maturity_levels:
+        return
+    inherited_cls_name = cls_def["inherits"]
+    inherited_cls_def, _ = proc.get_local_or_inherited_class(inherited_cls_name)
+    if "maturity" not in inherited_cls_def:
+        yield f"parent class {inherited_cls_name} is missing maturity attribute."
+    elif inherited_cls_def["maturity"] not in maturity_levels:
+        return
+    elif maturity_levels[inherited_cls_def["maturity"]] < maturity_levels[cls_def["maturity"]]:
+        yield f"maturity is greater than parent class {inherited_cls_name}."
+
+
+@rule("class-type")
+def check_class_type(proc, schema_class: str) -> Iterator[str]:
+    if proc.class_is_primitive(schema_class):
+        return
+    cls_def = proc.defs[schema_class]
+    if proc.class_is_abstract(schema_class):
+        if "type" in cls_def:
+            yield "abstract classes must not define a type."
+    elif cls_def.get("type") != "object":
+        yield 'concrete classes must be of type "object".'
+
+
+@rule("ga4gh-prefix")
+def check_ga4gh_prefix(proc, schema_class: str) -> Iterator[str]:
+    if proc.class_is_primitive(schema_class) or proc.class_is_abstract(schema_class):
+        return
+    raw_class_def = proc.raw_defs[schema_class]
+    if "inherits" not in raw_class_def or "ga4gh" in raw_class_def:
+        return
+    inherited_class, _ = proc.get_local_or_inherited_class(proc.defs[schema_class]["inherits"])
+    if "ga4gh" in inherited_class:
+        yield "is missing a defined prefix."
+
+
+@rule("ga4gh-identifiable")
+def check_ga4gh_identifiable(proc, schema_class: str) -> Iterator[str]:
+    if (
+        proc.class_is_primitive(schema_class)
+        or proc.class_is_abstract(schema_class)
+        or not proc.class_is_ga4gh_identifiable(schema_class)
+    ):
+        return
+    ga4gh = proc.defs[schema_class]["ga4gh"]
+    prefix = ga4gh["prefix"]
+    if not isinstance(prefix, str) or prefix == "":
+        yield "GA4GH identifiable objects must define a non-empty string prefix."
+    inherent = ga4gh.get("inherent", [])
+    if len(inherent) < 2:
+        yield f"GA4GH identifiable objects are expected to be defined by at least 2 properties, has {len(inherent)}."
+    if "type" not in inherent:
+        yield "GA4GH identifiable objects are expected to include the class type in inherent properties."
+
+
+@rule("ordered")
+def check_ordered(proc, schema_class: str) -> Iterator[str]:
+    if not proc.enforce_ordered or proc.class_is_primitive(schema_class):
+        return
+    for prop, prop_attribs in _own_properties(proc, schema_class).items():
+        if prop_attribs.get("type", "") != "array":
+            continue
+        if "ordered" not in prop_attribs:
+            yield f"{schema_class}.{prop} missing ordered attribute."
+        elif not isinstance(prop_attribs["ordered"], bool):
+            yield f"{schema_class}.{prop} ordered attribute must be a boolean."
+
+
+@rule("additional-properties")
+def check_additional_properties(proc, schema_class: str) -> Iterator[str]:
+    if not proc.strict or proc.class_is_primitive(schema_class):
+        return
+    for prop, prop_attribs in _own_properties(proc, schema_class).items():
+        if prop_attribs.get("type", "") == "object" and prop_attribs.get("additionalProperties", None) is None:
+            yield f'"additionalProperties" expected to be defined in {schema_class}.{prop}'
+
+
+def validate(proc, classes: Iterable[str] | None = None) -> list[Violation]:
+    """Runs every registered rule against the processed classes of a schema processor
+    and returns all violations found.
+
+    :param proc: a processed YamlSchemaProcessor
+    :param classes: restrict checks to these classes, defaults to all defined classes
+    """
+    if proc.defs is None:
+        return []
+    if classes is None:
+        classes = proc.defs
+    violations = []
+    for schema_class in classes:
+        for name, check in _rules:
+            violations.extend(Violation(schema_class, name, message) for message in check(proc, schema_class))
+    return violations
+
+
+def source_digest(source: bytes, import_digests: dict[str, str]) -> str:
+    """Returns a digest identifying a source document, its imports and the rule set
+    it is checked against.
+
+    :param source: raw bytes of the source document
+    :param import_digests: digests of imported sources, keyed by import namespace
+    """
+    h = hashlib.sha256(f"gks-rules-{RULESET_VERSION}\n".encode())
+    h.update(source)
+    for name, digest in sorted(import_digests.items()):
+        h.update(f"\n{name}={digest}".encode())
+    return h.hexdigest()
+
+
+def default_cache_path() -> Path:
+    if "GKS_VALIDATION_CACHE" in os.environ:
+        return Path(os.environ["GKS_VALIDATION_CACHE"])
+    cache_home = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(cache_home) / "gks-metaschema" / "validated.json"
+
+
+class ValidationCache:
+    """Persistent set of source digests that have already passed validation"""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else default_cache_path()
+        self._digests = None
+
+    def _load(self) -> set[str]:
+        if self._digests is None:
+            try:
+                with open(self.path) as f:
+                    self._digests = set(json.load(f))
+            except (FileNotFoundError, ValueError):
+                self._digests = set()
+        return self._digests
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._load()
+
+    def add(self, digest: str) -> None:
+        if digest in self._load():
+            return
+        # re-read so that digests recorded by concurrent builds are kept
+        self._digests = None
+        digests = self._load()
+        digests.add(digest)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(sorted(digests), f)
+        os.replace(tmp_path, self.path)
@@ -1,14 +1,51 @@
+import argparse
+import asyncio
+import copy
+import gzip
+import http.client
+import io
+import json
 import os
+import pickle
 import shutil
+import sqlite3
+import tarfile
+import threading
+import time
+import zipfile
 from pathlib import Path
 
 import pytest
 import yaml
 
+from ga4gh.gks.metaschema.scripts import source2instances
+from ga4gh.gks.metaschema.scripts.gksindex import cli as gksindex
+from ga4gh.gks.metaschema.scripts.gkslint import cli as gkslint
+from ga4gh.gks.metaschema.scripts.gksserve import SchemaServer, SchemaStore
+from ga4gh.gks.metaschema.scripts.jsy2js import (
+    convert_stream,
+    iter_ndjson_lines,
+    iter_yaml_documents,
+    ndjson_to_yaml_docs,
+    yaml_docs_to_ndjson,
+)
+from ga4gh.gks.metaschema.scripts.source2bundle import bundle_defs_to_js
 from ga4gh.gks.metaschema.scripts.source2classes import main as s2c
-from ga4gh.gks.metaschema.scripts.source2splitjs import split_defs_to_js
+from ga4gh.gks.metaschema.scripts.source2instances import write_instances
+from ga4gh.gks.metaschema.scripts.source2pack import write_pack
+from ga4gh.gks.metaschema.scripts.source2splitjs import build_split_doc, shard_defs_to_js, split_defs_to_js
 from ga4gh.gks.metaschema.scripts.y2t import main as y2t
+from ga4gh.gks.metaschema.tools.bundle import SchemaBundler
+from ga4gh.gks.metaschema.tools.dedupe import dedupe_subschemas
+from ga4gh.gks.metaschema.tools.frozen import FrozenDumper
+from ga4gh.gks.metaschema.tools.profiling import Profiler, add_profile_arguments, check_profile_arguments, span
+from ga4gh.gks.metaschema.tools.refs import iter_refs
+from ga4gh.gks.metaschema.tools.schema_diff import diff_schemas
+from ga4gh.gks.metaschema.tools.schema_pack import MAGIC, SchemaPack, SchemaPackError
+from ga4gh.gks.metaschema.tools.sinks import ArchiveSink, FileSystemSink, GzipSiblingSink, MemorySink
 from ga4gh.gks.metaschema.tools.source_proc import YamlSchemaProcessor
+from ga4gh.gks.metaschema.tools.synthetic import InstanceGenerator
+from ga4gh.gks.metaschema.tools.validation import SchemaValidationError, ValidationCache
 
 root = Path(__file__).parent
 
@@ -54,6 +91,52 @@ def test_split_create():
     assert True
 
 
+def test_split_both_modes(tmp_path):
+    shutil.copytree(root / "data", tmp_path / "data")
+    p = YamlSchemaProcessor(tmp_path / "data/vrs/vrs-source.yaml")
+    split_defs_to_js(p, mode="both")
+    for cls in ("Allele", "Location", "SequenceLocation"):
+        with open(p.json_fp / cls) as f:
+            assert f.read() == (root / "data/vrs/json" / cls).read_text()
+        with open(p.yaml_fp / cls) as f:
+            assert yaml.safe_load(f) == build_split_doc(p, cls, "yaml")
+
+
+def test_output_sinks(tmp_path):
+    memory = MemorySink()
+    split_defs_to_js(processor, mode="both", sink=memory)
+    y2t(processor, sink=memory)
+    with memory.open("vrs.yaml") as f:
+        processor.js_yaml_dump(f)
+    assert memory.files["json/Allele"] == (root / "data/vrs/json/Allele").read_bytes()
+
+    fs_root = tmp_path / "fs"
+    with GzipSiblingSink(FileSystemSink(fs_root)) as sink:
+        split_defs_to_js(processor, mode="both", sink=sink)
+        y2t(processor, sink=sink)
+        with sink.open("vrs.yaml") as f:
+            processor.js_yaml_dump(f)
+    for path, data in memory.files.items():
+        assert (fs_root / path).read_bytes() == data
+        assert gzip.decompress((fs_root / f"{path}.gz").read_bytes()) == data
+
+    for archive in ("split.zip", "split.tar.gz"):
+        with ArchiveSink(tmp_path / archive) as sink:
+            split_defs_to_js(processor, mode="both", sink=sink)
+            y2t(processor, sink=sink)
+            with sink.open("vrs.yaml") as f:
+                processor.js_yaml_dump(f)
+        if archive.endswith(".zip"):
+            with zipfile.ZipFile(tmp_path / archive) as z:
+                files = {name: z.read(name) for name in z.namelist()}
+        else:
+            with tarfile.open(tmp_path / archive) as t:
+                files = {m.name: t.extractfile(m).read() for m in t.getmembers()}
+        assert files == memory.files
+    # no build time in the gzip header, so archives are reproducible
+    assert (tmp_path / "split.tar.gz").read_bytes()[4:8] == b"\x00" * 4
+
+
 def test_class_create():
     s2c(processor)
     assert True
@@ -67,5 +150,460 @@ def test_docs_create():
     assert True
 
 
+def test_validation_reports_all_violations():
+    source = root / "data/gks-common/conditions-source.yaml"
+    p = YamlSchemaProcessor(source, check=False)
+    violations = p.validate()
+    assert [(v.schema_class, v.rule) for v in violations] == [
+        ("Condition", "maturity"),
+        ("TraitSet", "maturity-parent"),
+        ("Disease", "maturity-parent"),
+        ("Phenotype", "maturity-parent"),
+    ]
+    with pytest.raises(SchemaValidationError) as e:
+        YamlSchemaProcessor(source)
+    assert e.value.violations == violations
+
+
+def test_validation_checks_extended_properties(tmp_path, monkeypatch, capsys):
+    source = tmp_path / "extends-source.yaml"
+    source.write_text(
+        """
+$schema: "https://json-schema.org/draft/2020-12/schema"
+$id: "https://example.org/schema/extends-source.yaml"
+strict: true
+$defs:
+  Base:
+    maturity: draft
+    description: Base class.
+    heritableProperties:
+      members:
+        type: array
+        ordered: false
+        items:
+          type: string
+  Child:
+    inherits: Base
+    maturity: draft
+    description: Child class.
+    type: object
+    properties:
+      type:
+        type: string
+        const: Child
+      childMembers:
+        extends: members
+        type: array
+        description: Members of the child.
+"""
+    )
+    # ordered is inherited through extends, so the extending property is not a violation
+    p = YamlSchemaProcessor(source, check=False)
+    assert p.defs["Child"]["properties"]["childMembers"]["ordered"] is False
+    assert p.validate() == []
+
+    # extending a property that is not inherited is reported as a violation
+    source.write_text(source.read_text().replace("extends: members", "extends: nosuch"))
+    with pytest.raises(SchemaValidationError, match=r"\[extends\]"):
+        YamlSchemaProcessor(source, check=False)
+    # sources reached through different paths are reported once
+    conditions = root / "data/gks-common/conditions-source.yaml"
+    monkeypatch.setattr(
+        "sys.argv", ["gkslint", str(source), str(conditions), str(root / "data/vrs/../gks-common" / conditions.name)]
+    )
+    with pytest.raises(SystemExit) as e:
+        gkslint()
+    assert e.value.code == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"{source}: Child: childMembers extends nosuch, which is not an inherited property [extends]"
+    assert len(lines) == 5
+
+
+def test_trusted_skips_validated_sources(tmp_path, monkeypatch):
+    monkeypatch.setenv("GKS_VALIDATION_CACHE", str(tmp_path / "validated.json"))
+    p = YamlSchemaProcessor(root / "data/vrs/vrs-source.yaml", trusted=True)
+    assert p.digest in ValidationCache()
+
+    def fail(self, classes=None):
+        raise AssertionError("validation should be skipped")
+
+    monkeypatch.setattr(YamlSchemaProcessor, "validate", fail)
+    YamlSchemaProcessor(root / "data/vrs/vrs-source.yaml", trusted=True)
+    with pytest.raises(AssertionError):
+        YamlSchemaProcessor(root / "data/vrs/vrs-source.yaml")
+
+
+def test_schema_pack(tmp_path):
+    pack_fp = tmp_path / "vrs.gkspack"
+    with open(pack_fp, "wb") as f:
+        write_pack(processor, f)
+    with SchemaPack(pack_fp) as pack:
+        assert pack.document() == processor.for_js
+        assert pack.get("Allele") == processor.for_js["$defs"]["Allele"]
+        assert pack.get_split("Allele") == build_split_doc(processor, "Allele")
+        assert "Expression" in pack
+        unpickled = pickle.loads(pickle.dumps(pack))
+        assert unpickled.get_split("Haplotype") == pack.get_split("Haplotype")
+        unpickled.close()
+
+    data = pack_fp.read_bytes()
+    for bad in (b"", MAGIC + b"\x00" * 8, data[:100], data[:-10]):
+        bad_fp = tmp_path / "bad.gkspack"
+        bad_fp.write_bytes(bad)
+        with pytest.raises(SchemaPackError):
+            SchemaPack(bad_fp)
+    # documents that do not decode are reported as pack errors too
+    bad_fp.write_bytes(data[:-2] + b"!}")
+    with SchemaPack(bad_fp) as bad_pack, pytest.raises(SchemaPackError, match="invalid document"):
+        for cls in bad_pack:
+            bad_pack.get(cls)
+            bad_pack.get_split(cls)
+
+
+def test_schema_index(tmp_path, monkeypatch, capsys):
+    index = processor.index
+    assert {edge.source for edge in index.referrers("SequenceReference")} == {"SequenceLocation"}
+    iri_edge = index.referrers("IRI")[0]
+    assert iri_edge.target_schema == processor.imports["gks.core"].id
+    assert "CopyNumberChange" in index.classes_defining("location")
+    assert index.inherent("Allele") == ("location", "state", "type")
+
+    db = tmp_path / "index.db"
+    index.to_sqlite(db)
+    con = sqlite3.connect(db)
+    rows = con.execute("SELECT DISTINCT source FROM refs WHERE target = ?", ("SequenceReference",)).fetchall()
+    assert rows == [("SequenceLocation",)]
+    con.close()
+
+    for query in ("class", "inherent"):
+        monkeypatch.setattr("sys.argv", ["gksindex", str(root / "data/vrs/vrs-source.yaml"), query, "NoSuch"])
+        with pytest.raises(SystemExit) as e:
+            gksindex()
+        assert e.value.code == 2
+        assert "unknown class: NoSuch" in capsys.readouterr().err
+
+
+def test_schema_server(tmp_path):
+    shutil.copytree(root / "data", tmp_path / "data")
+    source = tmp_path / "data/gnomAD/gnomad-caf-source.yaml"
+    p = YamlSchemaProcessor(source)
+    path = p.get_class_abs_path("GnomadCAF", "json")
+
+    loop = asyncio.new_event_loop()
+    server = SchemaServer(SchemaStore([source]), port=0, reload_interval=0.05)
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        con = http.client.HTTPConnection("127.0.0.1", server.port)
+        con.request("GET", path)
+        response = con.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read()) == build_split_doc(p, "GnomadCAF")
+        etag = response.getheader("ETag")
+
+        con.request("GET", path, headers={"If-None-Match": etag})
+        response = con.getresponse()
+        response.read()
+        assert response.status == 304
+
+        con.request("GET", p.get_class_abs_path("GnomadCAF", "yaml"), headers={"Accept-Encoding": "gzip"})
+        response = con.getresponse()
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert yaml.safe_load(gzip.decompress(response.read()))["title"] == "GnomadCAF"
+
+        # the gzip representation has its own validator, and q=0 refuses it
+        con.request("GET", path, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        response = con.getresponse()
+        response.read()
+        assert response.status == 200
+        assert response.getheader("ETag") == etag[:-1] + '-gz"'
+        assert response.getheader("Vary") == "Accept-Encoding"
+        con.request("GET", path, headers={"Accept-Encoding": "gzip;q=0, identity"})
+        response = con.getresponse()
+        assert response.getheader("Content-Encoding") is None
+        response.read()
+
+        # request bodies are consumed before the next request on the connection
+        con.request("POST", path, body=b'{"GET /x HTTP/1.1": 1}')
+        response = con.getresponse()
+        response.read()
+        assert response.status == 405
+        con.request("GET", path)
+        response = con.getresponse()
+        response.read()
+        assert response.status == 200
+
+        source.write_text(source.read_text().replace("gnomAD CAF", "gnomAD cohort allele frequency"))
+        for _ in range(100):
+            time.sleep(0.05)
+            con.request("GET", path, headers={"If-None-Match": etag})
+            response = con.getresponse()
+            response.read()
+            if response.status == 200:
+                break
+        assert response.status == 200
+        con.close()
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+
+def test_schema_diff(tmp_path):
+    shutil.copytree(root / "data", tmp_path / "data")
+    source = tmp_path / "data/vrs/vrs-source.yaml"
+    text = source.read_text()
+    text = text.replace("privateTo: Variation\n    maturity: draft", "privateTo: Variation\n    maturity: trial use")
+    text = text.replace("A sha512t24u digest created using the VRS Computed Identifier algorithm.", "A digest.")
+    source.write_text(text)
+    report = diff_schemas(processor, YamlSchemaProcessor(source))
+    assert report["added_classes"] == report["removed_classes"] == []
+    assert report["changed_classes"]["Expression"] == {"maturity": ["draft", "trial use"]}
+    assert report["changed_classes"]["Allele"] == {"changed_properties": ["digest"]}
+    assert "SequenceReference" not in report["changed_classes"]
+    assert diff_schemas(processor, processor)["changed_classes"] == {}
+
+
+def test_profiler():
+    seen = []
+    with Profiler(track_memory=True, hooks=[seen.append]) as profiler:
+        p = YamlSchemaProcessor(root / "data/vrs/vrs-source.yaml")
+        split_defs_to_js(p, sink=MemorySink())
+    report = profiler.report()
+    assert seen == profiler.records
+    for stage in ("load_yaml", "process_schema", "process_schema_class", "clean_for_js", "write_split_doc"):
+        assert report["stages"][stage]["count"] > 0
+    allele = report["classes"]["Allele"]
+    assert allele["process_schema_class"]["count"] == 1
+    assert allele["write_split_doc"]["allocated"] is not None
+    assert all(r.self_time <= r.duration for r in profiler.records)
+
+    # spans in concurrent threads nest separately
+    barrier = threading.Barrier(4)
+
+    def work():
+        with span("outer"):
+            barrier.wait()
+            with span("inner"):
+                barrier.wait()
+
+    with Profiler() as profiler:
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert sorted((r.name, r.depth) for r in profiler.records) == [("inner", 1)] * 4 + [("outer", 0)] * 4
+    assert all(r.self_time >= 0 for r in profiler.records)
+
+    parser = argparse.ArgumentParser()
+    add_profile_arguments(parser)
+    with pytest.raises(SystemExit):
+        check_profile_arguments(parser, parser.parse_args(["--profile-memory"]))
+
+
+def test_streaming_conversion():
+    docs = [{"type": "Allele", "digest": f"d{i}", "state": {"sequence": "ACGT" * i}} for i in range(50)]
+    text = "# comment\n%YAML 1.1\n" + yaml.dump_all(docs, explicit_start=True) + "---\n...\n--- [1, 2]\n"
+    expected = list(yaml.safe_load_all(text))
+    assert len(list(iter_yaml_documents(io.StringIO(text)))) == len(expected)
+    for jobs in (1, 2):
+        out = io.StringIO()
+        convert_stream(iter_yaml_documents(io.StringIO(text)), yaml_docs_to_ndjson, out, jobs=jobs, batch_size=200)
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == expected
+        back = io.StringIO()
+        convert_stream(iter_ndjson_lines(io.StringIO(out.getvalue())), ndjson_to_yaml_docs, back, jobs=jobs)
+        assert list(yaml.safe_load_all(back.getvalue())) == expected
+
+
+def test_update_class(tmp_path):
+    shutil.copytree(root / "data", tmp_path / "data")
+    source = tmp_path / "data/vrs/vrs-source.yaml"
+    p = YamlSchemaProcessor(source)
+    variation = dict(p.raw_defs["Variation"])
+    variation["heritableProperties"] = variation["heritableProperties"] | {"label": {"type": "string"}}
+    changed = p.update_class("Variation", variation)
+    assert {"Variation", "Allele", "CopyNumberCount"} <= changed
+    assert "SequenceLocation" not in changed
+    assert "label" in p.for_js["$defs"]["Allele"]["properties"]
+    assert "Variation" in p.index.classes_defining("label")
+
+    raw = yaml.safe_load(source.read_text())
+    raw["$defs"]["Variation"] = variation
+    source.write_text(yaml.safe_dump(raw, sort_keys=False))
+    q = YamlSchemaProcessor(source)
+    assert p.defs == q.defs
+    assert p.for_js == q.for_js
+
+    allele = dict(p.raw_defs["Allele"])
+    allele.pop("maturity")
+    with pytest.raises(SchemaValidationError):
+        p.update_class("Allele", allele)
+    assert p.defs == q.defs
+    assert p.update_class("Allele", p.raw_defs["Allele"]) == set()
+
+    digest = q.digest
+    with pytest.raises(SchemaValidationError):
+        q.update_class("Allele", allele)
+    assert q.digest == digest is not None
+
+    # failures while reprocessing roll back too, and cycles are rejected up front
+    state = copy.deepcopy((q.raw_defs, q.defs, q.for_js, q.processed_classes))
+    with pytest.raises(KeyError):
+        q.update_class("Allele", q.raw_defs["Allele"] | {"inherits": "NoSuchParent"})
+    assert (q.raw_defs, q.defs, q.for_js, q.processed_classes) == state
+    assert q.digest == digest
+    assert "Allele" in q.index.classes_defining("location")
+    with pytest.raises(ValueError, match="inherit from itself"):
+        q.update_class("Variation", q.raw_defs["Variation"] | {"inherits": "Allele"})
+    assert (q.raw_defs, q.defs, q.for_js, q.processed_classes) == state
+
+    p.defs = None
+    with pytest.raises(ValueError, match="defines no"):
+        p.update_class("Allele", allele)
+
+
+def test_bundles():
+    sink = MemorySink()
+    bundle_defs_to_js(processor, sink)
+    allele = json.loads(sink.files["bundle/Allele"])
+    assert allele["$id"] == "https://w3id.org/ga4gh/schema/vrs/2.x/bundle/Allele"
+    assert {"SequenceLocation", "SequenceReference", "LiteralSequenceExpression"} <= allele["$defs"].keys()
+    for path, data in sink.files.items():
+        doc = json.loads(data)
+        assert {ref.split("/")[-1] for ref in iter_refs(doc)} <= doc.get("$defs", {}).keys(), path
+
+    p = YamlSchemaProcessor(root / "data/gnomAD/gnomad-caf-source.yaml")
+    bundler = SchemaBundler(p)
+    doc = bundler.bundle("GnomadCAF")
+    assert {"GrpMaxFAF95", "GnomadCafProperties", "CohortAlleleFrequency", "Allele"} <= doc["$defs"].keys()
+    assert "GnomadCAF" not in doc["$defs"]
+    assert bundler.closure("Allele") is bundler.closure("Allele")
+
+
+def test_shards():
+    sink = MemorySink()
+    shards = shard_defs_to_js(processor, 3, sink)
+    assert 1 < len(shards) <= 3
+    manifest = json.loads(sink.files["shards/manifest"])
+    assert manifest["classes"].keys() == processor.for_js["$defs"].keys()
+    docs = {manifest["shards"][i]: json.loads(sink.files[f"shards/{i}"]) for i in range(len(shards))}
+    for path, doc in docs.items():
+        assert doc["$id"].endswith(path)
+        for ref in iter_refs(doc):
+            ref_path, _, fragment = ref.partition("#")
+            target = fragment.split("/")[-1]
+            if ref_path.startswith("/ga4gh/schema/gks-common/"):
+                continue
+            assert target in docs[ref_path or path]["$defs"], ref
+
+    p = YamlSchemaProcessor(root / "data/gnomAD/gnomad-caf-source.yaml")
+    shards = shard_defs_to_js(p, 3, MemorySink())
+    assert ["GnomadCAF", "GnomadCafProperties", "GrpMaxFAF95"] in [sorted(s) for s in shards]
+
+
+def test_snapshot():
+    snapshot = processor.snapshot()
+    unpickled = pickle.loads(pickle.dumps(snapshot))
+    assert unpickled.for_js == processor.for_js
+    assert unpickled.class_is_passthrough("MolecularVariation")
+    assert unpickled.get_all_descendants("Variation") == processor.get_all_descendants("Variation")
+    with pytest.raises(TypeError):
+        snapshot.defs["Allele"]["required"].append("label")
+    with pytest.raises(TypeError):
+        unpickled.has_protected_members["Allele"] = set()
+    with pytest.raises(AttributeError):
+        snapshot.id = "other"
+
+    expected, sink = MemorySink(), MemorySink()
+    split_defs_to_js(processor, mode="both", sink=expected)
+    split_defs_to_js(unpickled, mode="both", sink=sink)
+    assert sink.files == expected.files
+    assert yaml.dump(snapshot.for_js, sort_keys=False, Dumper=FrozenDumper) == yaml.dump(
+        processor.for_js, sort_keys=False
+    )
+    # other yaml dumps in the process are unaffected by snapshots
+    with pytest.raises(yaml.representer.RepresenterError):
+        yaml.safe_dump(snapshot.for_js)
+    # derived caches are built on first use without setting attributes
+    assert snapshot.index.classes_defining("location") == processor.index.classes_defining("location")
+    assert unpickled.index.classes_defining("location") == processor.index.classes_defining("location")
+
+
+def test_dedupe_subschemas():
+    doc, report = dedupe_subschemas(processor.for_js, "$defs", min_size=64)
+    shared = {name: d for name, d in doc["$defs"].items() if name not in processor.for_js["$defs"]}
+    assert len(shared) == report.shared > 0
+    assert report.replaced > report.shared
+    assert report.size_after < report.size_before
+
+    def inline(node):
+        if isinstance(node, list):
+            return [inline(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        node = {k: inline(v) for k, v in node.items()}
+        name = node.get("$ref", "").split("/")[-1]
+        if name in shared:
+            node.pop("$ref")
+            node.update(inline(shared[name]))
+        return node
+
+    inlined = inline(doc)
+    for name in shared:
+        del inlined["$defs"][name]
+    assert inlined == processor.for_js
+
+    # nodes with their own $ref keep their applicators in place
+    variants = {"oneOf": [{"type": "string", "pattern": "^[A-Z]+$"}, {"type": "integer", "minimum": 0}]}
+    a = {"$ref": "#/$defs/Z", **variants, "description": "a"}
+    b = {"$ref": "#/$defs/Z", **variants, "description": "b"}
+    doc = {"$defs": {"Z": {"type": "object"}, "A": {"properties": {"z": a}}, "B": {"properties": {"z": b}}}}
+    deduped, report = dedupe_subschemas(doc, "$defs", min_size=8)
+    assert report.shared == 0
+    assert deduped == doc
+
+
+def test_synthetic_instances():
+    jsonschema = pytest.importorskip("jsonschema")
+    bundler = SchemaBundler(processor)
+    generator = InstanceGenerator(processor, seed=7)
+    for cls in generator.classes():
+        doc = bundler.bundle(cls)
+        validator = jsonschema.validators.validator_for(doc)(doc)
+        for instance in generator.instances(cls, 0, 50):
+            validator.validate(instance)
+
+    # the same instances however the work is divided
+    out = io.StringIO()
+    write_instances(processor, out, 10, ["Allele", "Haplotype"], seed=7, chunk_size=3)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 20
+    assert json.loads(lines[12]) == generator.instance("Haplotype", 2)
+    parallel = io.StringIO()
+    write_instances(processor, parallel, 10, ["Allele", "Haplotype"], seed=7, jobs=2, chunk_size=4)
+    assert parallel.getvalue() == out.getvalue()
+    assert source2instances._generator is None
+
+    # bounds on strings, numbers and unique items
+    schemas = [
+        {"type": "string", "minLength": 30},
+        {"type": "string", "maxLength": 4},
+        {"type": "string", "pattern": "^[A-Z]{1,8}$", "minLength": 6},
+        {"type": "integer", "exclusiveMinimum": 0, "exclusiveMaximum": 2},
+        {"type": "integer", "minimum": 5000},
+        {"type": "number", "exclusiveMinimum": 0, "exclusiveMaximum": 1e-7},
+        {"type": "array", "items": {"type": "boolean"}, "uniqueItems": True, "minItems": 2},
+        {"type": "array", "items": {"enum": [1, 2, 3]}, "uniqueItems": True, "minItems": 3},
+    ]
+    rng = generator.rng("bounds", 0)
+    for schema in schemas:
+        for _ in range(20):
+            jsonschema.validate(generator.generate(schema, rng), schema)
+    with pytest.raises(ValueError, match="distinct"):
+        generator.generate({"type": "array", "items": {"const": 1}, "uniqueItems": True, "minItems": 2}, rng)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])